@@ -0,0 +1,8 @@
+import time
+from dotenv import load_dotenv
+
+# Start of the cold-start clock reported by GET /ready
+IMPORTED_AT = time.perf_counter()
+
+# Loaded once, before any module reads its settings from the environment
+load_dotenv()
@@ -0,0 +1,154 @@
+import json
+from typing import Literal, Optional
+from bson import ObjectId
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_OPERATIONS = 50000
+
+
+class BulkOperation(BaseModel):
+    """One entry of a /bulk request body.
+
+    - create: insert `doc` (validated with the *Create model)
+    - upsert: replace-or-insert `doc` by `id`, or by the collection's natural key
+    - update: $set the fields of `doc` (validated with the *Update model) on `id`
+    - delete: remove `id`
+    """
+    op: Literal["create", "upsert", "update", "delete"]
+    id: Optional[str] = None
+    doc: Optional[dict] = None
+
+
+async def read_bulk_body(request: Request) -> list:
+    """Accept either a JSON array or NDJSON (one operation per line)."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Bulk body must be a JSON array or NDJSON")
+    if len(items) > MAX_BULK_OPERATIONS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_OPERATIONS} operations per request"
+        )
+    return items
+
+
+def _to_write(
+    raw, create_model: type[BaseModel], update_model: type[BaseModel], natural_key: Optional[str]
+):
+    """Validate one raw operation; return it with its pymongo write model and,
+    for creates, the document (insert fills in its _id)."""
+    op = BulkOperation.model_validate(raw)
+    oid = None
+    if op.id is not None:
+        if not ObjectId.is_valid(op.id):
+            raise ValueError("Invalid ID format")
+        oid = ObjectId(op.id)
+
+    if op.op == "create":
+        doc = create_model.model_validate(op.doc or {}).model_dump()
+        return op, InsertOne(doc), doc
+
+    if op.op == "upsert":
+        doc = create_model.model_validate(op.doc or {}).model_dump()
+        if oid is not None:
+            return op, ReplaceOne({"_id": oid}, doc, upsert=True), None
+        if natural_key and doc.get(natural_key):
+            return op, ReplaceOne({natural_key: doc[natural_key]}, doc, upsert=True), None
+        raise ValueError(f"upsert needs an id{f' or {natural_key}' if natural_key else ''}")
+
+    if oid is None:
+        raise ValueError(f"{op.op} needs an id")
+    if op.op == "update":
+        update_data = {
+            k: v for k, v in update_model.model_validate(op.doc or {}).model_dump().items() if v is not None
+        }
+        if not update_data:
+            raise ValueError("No fields to update")
+        return op, UpdateOne({"_id": oid}, {"$set": update_data}), None
+    return op, DeleteOne({"_id": oid}), None
+
+
+async def _drop_missing(collection, chunk: list, results: list) -> list:
+    """Record not_found for updates/deletes of ids that don't exist; return the rest of the chunk."""
+    ids = {ObjectId(op.id) for _, op, _, _ in chunk if op.op in ("update", "delete")}
+    if not ids:
+        return chunk
+    existing = {d["_id"] async for d in collection.find({"_id": {"$in": list(ids)}}, {"_id": 1})}
+    kept = []
+    for entry in chunk:
+        i, op, _, _ = entry
+        if op.op in ("update", "delete") and ObjectId(op.id) not in existing:
+            results[i] = {"index": i, "op": op.op, "status": "not_found", "id": op.id}
+        else:
+            kept.append(entry)
+    return kept
+
+
+async def run_bulk(
+    collection,
+    raw_ops: list,
+    create_model: type[BaseModel],
+    update_model: type[BaseModel],
+    natural_key: Optional[str] = None,
+) -> dict:
+    """Validate every operation, apply the valid ones as chunked unordered bulk_writes
+    and return a summary plus a per-item result list (same order as the input).
+
+    An update or delete whose id matches no document is reported as not_found
+    and left out of the write: unordered bulk_write results only carry totals,
+    so a no-op could not be told apart from a success afterwards.
+    """
+    results: list[dict] = [None] * len(raw_ops)
+    pending = []    # (input index, BulkOperation, write model, inserted doc or None)
+
+    for i, raw in enumerate(raw_ops):
+        try:
+            op, write, doc = _to_write(raw, create_model, update_model, natural_key)
+        except ValueError as e:
+            # ValidationError is a ValueError; keep its structured, JSON-safe error list
+            detail = json.loads(e.json(include_url=False)) if isinstance(e, ValidationError) else str(e)
+            results[i] = {"index": i, "status": "error", "error": detail}
+            continue
+        pending.append((i, op, write, doc))
+
+    summary = {"inserted": 0, "upserted": 0, "matched": 0, "modified": 0, "deleted": 0}
+    for start in range(0, len(pending), BULK_CHUNK_SIZE):
+        chunk = await _drop_missing(collection, pending[start:start + BULK_CHUNK_SIZE], results)
+        if not chunk:
+            continue
+        try:
+            result = await collection.bulk_write([w for _, _, w, _ in chunk], ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+        for key, field in (("inserted", "nInserted"), ("upserted", "nUpserted"), ("matched", "nMatched"),
+                           ("modified", "nModified"), ("deleted", "nRemoved")):
+            summary[key] += details.get(field, 0)
+
+        failed = {err["index"]: err for err in details.get("writeErrors", [])}
+        upserted = {u["index"]: u["_id"] for u in details.get("upserted", [])}
+        for pos, (i, op, _, doc) in enumerate(chunk):
+            if pos in failed:
+                results[i] = {"index": i, "op": op.op, "status": "error", "error": failed[pos].get("errmsg")}
+                continue
+            doc_id = op.id
+            if doc is not None:
+                doc_id = str(doc["_id"])
+            elif pos in upserted:
+                doc_id = str(upserted[pos])
+            results[i] = {"index": i, "op": op.op, "status": "ok", "id": doc_id}
+
+    summary["not_found"] = sum(1 for r in results if r["status"] == "not_found")
+    summary["errors"] = sum(1 for r in results if r["status"] == "error")
+    return {"summary": summary, "results": results}
@@ -1,23 +1,227 @@
+"""MongoDB client, built from environment settings when the app starts.
+
+`connect()` creates the Motor client (called from the startup handler; the
+first use connects too, for scripts). `client`, `db` and the *_collection
+names are proxies that resolve on access, so modules can import them before
+the client exists.
+
+Settings (all optional):
+
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE / MONGO_MAX_IDLE_TIME_MS: connection pool
+- MONGO_COMPRESSORS: wire compression, e.g. "zstd,snappy,zlib"; compressors whose
+  Python package is missing are skipped
+- MONGO_SERVER_SELECTION_TIMEOUT_MS / MONGO_CONNECT_TIMEOUT_MS /
+  MONGO_SOCKET_TIMEOUT_MS / MONGO_WAIT_QUEUE_TIMEOUT_MS: fail fast instead of queueing
+- MONGO_READ_PREFERENCE / MONGO_READ_CONCERN: client-wide defaults
+- MONGO_COLLECTION_READ_PREFERENCES / MONGO_COLLECTION_READ_CONCERNS: per-collection
+  overrides, e.g. "contracts=secondaryPreferred,vendors=secondaryPreferred". Reads
+  inside transactions always go to the primary.
+- MONGO_LIST_READ_PREFERENCE: read preference for the paginated list queries only,
+  e.g. secondaryPreferred, so single-document reads after a write stay on the primary
+- MONGO_LIST_MAX_TIME_MS: server-side time limit for list queries (see pagination.py)
+"""
 import os
+import importlib.util
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-
-load_dotenv()
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import ReadPreference
+from ..services.metrics import command_metrics, pool_metrics
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "procurement")
+LIST_MAX_TIME_MS = int(os.getenv("MONGO_LIST_MAX_TIME_MS", "0")) or None
+LIST_READ_PREFERENCE = os.getenv("MONGO_LIST_READ_PREFERENCE", "")
+CLIENT_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "")
+CLIENT_READ_CONCERN = os.getenv("MONGO_READ_CONCERN", "")
+DEFAULT_MAX_POOL_SIZE = 100  # pymongo's default
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primarypreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondarypreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+READ_CONCERN_LEVELS = ("local", "available", "majority", "linearizable", "snapshot")
+# Python packages pymongo needs for each wire compressor
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name, "")
+    return int(value) if value else None
+
+
+def _mapping_env(name: str) -> dict[str, str]:
+    """Parse "a=x,b=y" into {"a": "x", "b": "y"}."""
+    pairs = (item.split("=", 1) for item in os.getenv(name, "").split(",") if "=" in item)
+    return {key.strip(): value.strip() for key, value in pairs}
+
+
+def _compressors() -> Optional[str]:
+    available = []
+    for name in (c.strip() for c in os.getenv("MONGO_COMPRESSORS", "").split(",") if c.strip()):
+        module = COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module):
+            available.append(name)
+        else:
+            print(f"MongoDB compressor {name!r} unavailable, skipping")
+    return ",".join(available) or None
+
+
+def client_options() -> dict:
+    """Keyword arguments for AsyncIOMotorClient from the MONGO_* settings."""
+    options = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE"),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE"),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS"),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS"),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS"),
+        "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        "compressors": _compressors(),
+        # Accepted in any case, like the other read preference settings
+        "readPreference": READ_PREFERENCES[CLIENT_READ_PREFERENCE.lower()].mongos_mode
+        if CLIENT_READ_PREFERENCE else None,
+        "readConcernLevel": CLIENT_READ_CONCERN or None,
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    options["event_listeners"] = [command_metrics, pool_metrics]
+    return options
+
+
+def collection_options(name: str) -> dict:
+    """read_preference / read_concern overrides for one collection."""
+    options = {}
+    preference = _mapping_env("MONGO_COLLECTION_READ_PREFERENCES").get(name)
+    if preference:
+        options["read_preference"] = READ_PREFERENCES[preference.lower()]
+    concern = _mapping_env("MONGO_COLLECTION_READ_CONCERNS").get(name)
+    if concern:
+        options["read_concern"] = ReadConcern(concern)
+    return options
+
+
+_client: Optional[AsyncIOMotorClient] = None
+_collections: dict = {}
+_list_collections: dict = {}
+
+
+def validate_settings():
+    """Raise ValueError for read preference / read concern settings that would
+    otherwise only fail on the first request to the collection."""
+    errors = []
+    if CLIENT_READ_PREFERENCE and CLIENT_READ_PREFERENCE.lower() not in READ_PREFERENCES:
+        errors.append(f"MONGO_READ_PREFERENCE={CLIENT_READ_PREFERENCE!r}")
+    # The client accepts any readConcernLevel; the server rejects it on the first read
+    if CLIENT_READ_CONCERN and CLIENT_READ_CONCERN not in READ_CONCERN_LEVELS:
+        errors.append(f"MONGO_READ_CONCERN={CLIENT_READ_CONCERN!r}")
+    if LIST_READ_PREFERENCE and LIST_READ_PREFERENCE.lower() not in READ_PREFERENCES:
+        errors.append(f"MONGO_LIST_READ_PREFERENCE={LIST_READ_PREFERENCE!r}")
+    for name, preference in _mapping_env("MONGO_COLLECTION_READ_PREFERENCES").items():
+        if preference.lower() not in READ_PREFERENCES:
+            errors.append(f"MONGO_COLLECTION_READ_PREFERENCES {name}={preference!r}")
+    for name, concern in _mapping_env("MONGO_COLLECTION_READ_CONCERNS").items():
+        if concern not in READ_CONCERN_LEVELS:
+            errors.append(f"MONGO_COLLECTION_READ_CONCERNS {name}={concern!r}")
+    if errors:
+        raise ValueError(
+            f"Invalid MongoDB settings: {', '.join(errors)} "
+            f"(read preferences: {', '.join(READ_PREFERENCES)}; read concerns: {', '.join(READ_CONCERN_LEVELS)})"
+        )
+
+
+def connect() -> AsyncIOMotorClient:
+    """Create the client if needed. Motor connects in the background, so this doesn't block.
 
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client[DATABASE_NAME]
+    Invalid settings raise here, at startup, instead of on the first request.
+    """
+    global _client
+    if _client is None:
+        validate_settings()
+        options = client_options()
+        _client = AsyncIOMotorClient(MONGODB_URL, **options)
+        pool_metrics.configure(options.get("maxPoolSize", DEFAULT_MAX_POOL_SIZE))
+    return _client
 
-vendor_compliances_collection = db["vendor_compliances"]
-email_threads_collection = db["email_threads"]
-messages_collection = db["messages"]
-vendors_collection = db["vendors"]
-contracts_collection = db["contracts"]
-internal_vendors_collection = db["internal_vendors"]
+
+def close():
+    global _client, _supports_transactions
+    if _client is not None:
+        _client.close()
+    _client = None
+    _collections.clear()
+    _list_collections.clear()
+    _supports_transactions = None
+
+
+def get_database():
+    return connect()[DATABASE_NAME]
+
+
+def get_collection(name: str):
+    collection = _collections.get(name)
+    if collection is None:
+        collection = _collections[name] = get_database().get_collection(name, **collection_options(name))
+    return collection
+
+
+def for_lists(collection):
+    """`collection` with the MONGO_LIST_READ_PREFERENCE read preference, if one is set."""
+    if not LIST_READ_PREFERENCE:
+        return collection
+    view = _list_collections.get(collection.name)
+    if view is None:
+        view = _list_collections[collection.name] = get_collection(collection.name).with_options(
+            read_preference=READ_PREFERENCES[LIST_READ_PREFERENCE.lower()]
+        )
+    return view
+
+
+class _Lazy:
+    """Stands in for an object created on first access (the client, database or a collection)."""
+
+    def __init__(self, resolve, name: str):
+        self._resolve = resolve
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __repr__(self):
+        return f"<lazy {self._name}>"
+
+
+client = _Lazy(connect, "client")
+db = _Lazy(get_database, "database")
+
+vendor_compliances_collection = _Lazy(lambda: get_collection("vendor_compliances"), "vendor_compliances")
+email_threads_collection = _Lazy(lambda: get_collection("email_threads"), "email_threads")
+messages_collection = _Lazy(lambda: get_collection("messages"), "messages")
+vendors_collection = _Lazy(lambda: get_collection("vendors"), "vendors")
+contracts_collection = _Lazy(lambda: get_collection("contracts"), "contracts")
+internal_vendors_collection = _Lazy(lambda: get_collection("internal_vendors"), "internal_vendors")
+
+
+_supports_transactions = None
 
 
 async def ping_db():
     await client.admin.command("ping")
     return True
+
+
+async def supports_transactions() -> bool:
+    """True when connected to a replica set or sharded cluster (cached after first check)."""
+    global _supports_transactions
+    if _supports_transactions is None:
+        try:
+            hello = await client.admin.command("hello")
+            _supports_transactions = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception:
+            _supports_transactions = False
+    return _supports_transactions
@@ -0,0 +1,241 @@
+"""Declarative index specs for every collection, and the reconciler that applies them.
+
+INDEX_SPECS is the single list of indexes the API relies on. At startup
+`index_manager.start(db)` diffs it against list_indexes() and builds whatever
+is missing in a background task, so the app serves requests while builds run
+(MongoDB 4.2+ builds hold exclusive locks only at the start and end).
+Existing indexes are never dropped or rebuilt: option mismatches and indexes
+no spec declares are only reported.
+
+Report missing, conflicting, unmanaged and unused indexes ($indexStats), and
+optionally build the missing ones:
+
+    python -m app.database.indexes
+    python -m app.database.indexes --apply
+"""
+import asyncio
+import argparse
+from typing import Optional, Union
+from pymongo import IndexModel
+
+KeySpec = Union[str, list[tuple[str, int]]]
+
+
+class IndexSpec:
+    def __init__(self, keys: KeySpec, unique: bool = False, sparse: bool = False,
+                 partial: Optional[dict] = None, reason: str = ""):
+        self.keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        self.unique = unique
+        self.sparse = sparse
+        self.partial = partial      # partialFilterExpression
+        self.reason = reason        # the query the index serves, shown in reports
+
+    @property
+    def name(self) -> str:
+        # MongoDB's default name, so specs line up with indexes created by hand
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    @property
+    def key_tuple(self) -> tuple:
+        return tuple(self.keys)
+
+    def options(self) -> dict:
+        options = {}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.partial:
+            options["partialFilterExpression"] = self.partial
+        return options
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, **self.options())
+
+    def matches(self, info: dict) -> bool:
+        """True when an existing index (a list_indexes() entry) has this spec's options."""
+        return (
+            bool(info.get("unique")) == self.unique
+            and bool(info.get("sparse")) == self.sparse
+            and dict(info.get("partialFilterExpression") or {}) == (self.partial or {})
+        )
+
+
+# Compound indexes backing the GET /api/contracts filters and keyset sorts
+CONTRACT_LIST_INDEXES = [
+    [("vendor_id", 1), ("_id", 1)],
+    [("contract_status", 1), ("contract_end_date", 1), ("_id", 1)],
+    [("department", 1), ("contract_status", 1), ("_id", 1)],
+    [("business_unit", 1), ("_id", 1)],
+    [("risk_level", 1), ("contract_status", 1), ("_id", 1)],
+    [("service_category", 1), ("_id", 1)],
+    [("contract_start_date", 1), ("_id", 1)],
+    [("contract_end_date", 1), ("_id", 1)],
+    [("contract_value_usd", 1), ("_id", 1)],
+]
+
+INDEX_SPECS: dict[str, list[IndexSpec]] = {
+    "vendors": [
+        IndexSpec("vendor_id", unique=True, reason="by-vendor-id lookups, bulk upserts, all-ids scan"),
+        IndexSpec("vendor_profile.vendor_id", sparse=True, reason="nested vendor_id lookups"),
+    ],
+    "internal_vendors": [
+        IndexSpec("vendor_id", reason="by-vendor-id lookups, all-ids scan"),
+        IndexSpec("vendor_profile.vendor_id", sparse=True, reason="nested vendor_id lookups"),
+    ],
+    "contracts": [
+        IndexSpec("contract_id", reason="GET /contracts/by-contract-id, bulk upserts"),
+        *(IndexSpec(keys, reason="contract list filters and keyset sorts") for keys in CONTRACT_LIST_INDEXES),
+    ],
+    "email_threads": [
+        IndexSpec([("vendor_id", 1), ("_id", 1)], reason="threads by vendor (keyset), vendor full $lookup"),
+        # Only non-empty ids are unique: threads created without one store "" (the model default)
+        IndexSpec("thread_id", unique=True, partial={"thread_id": {"$gt": ""}},
+                  reason="certificate status updates, bulk upserts, realtime thread -> vendor"),
+    ],
+    "messages": [
+        IndexSpec([("thread_id", 1), ("_id", 1)], reason="messages by thread (keyset), vendor full $lookup"),
+    ],
+    "vendor_compliances": [
+        IndexSpec("vendor_id", reason="vendor full $lookup, compliance analytics by vendor"),
+    ],
+}
+
+
+def _key_tuple(info: dict) -> tuple:
+    return tuple((field, direction) for field, direction in info["key"].items())
+
+
+async def diff_collection(collection, specs: list[IndexSpec]) -> dict:
+    """Compare `specs` with the indexes that exist on `collection`."""
+    existing = {}
+    async for info in collection.list_indexes():
+        existing[_key_tuple(info)] = info
+    declared = {spec.key_tuple for spec in specs}
+
+    missing, conflicting, present = [], [], []
+    for spec in specs:
+        info = existing.get(spec.key_tuple)
+        if info is None:
+            missing.append(spec)
+        elif not spec.matches(info):
+            conflicting.append({"name": info["name"], "expected": spec.options(),
+                                "found": {k: info[k] for k in ("unique", "sparse", "partialFilterExpression") if k in info}})
+        else:
+            present.append(info["name"])
+    unmanaged = [info["name"] for keys, info in existing.items() if keys not in declared and info["name"] != "_id_"]
+    return {"missing": missing, "conflicting": conflicting, "present": present, "unmanaged": unmanaged}
+
+
+async def reconcile(db, specs: dict[str, list[IndexSpec]] = INDEX_SPECS, build: bool = True) -> dict:
+    """Diff every collection against its specs and, with `build`, create the missing indexes.
+
+    Missing indexes of one collection go out in a single createIndexes command,
+    which builds them in one pass over the collection. If that fails (say a
+    unique index over duplicate data), each is retried alone so one bad spec
+    doesn't hold back the others.
+    """
+    report = {}
+    for name, collection_specs in specs.items():
+        collection = db[name]
+        entry = await diff_collection(collection, collection_specs)
+        missing = entry.pop("missing")
+        entry["missing"] = [spec.name for spec in missing]
+        if build and missing:
+            try:
+                await collection.create_indexes([spec.model() for spec in missing])
+                entry["built"], entry["missing"] = entry["missing"], []
+            except Exception:
+                entry["built"], entry["missing"], errors = [], [], []
+                for spec in missing:
+                    try:
+                        await collection.create_indexes([spec.model()])
+                        entry["built"].append(spec.name)
+                    except Exception as e:
+                        entry["missing"].append(spec.name)
+                        errors.append(f"{spec.name}: {e}")
+                        print(f"Index build for {name}.{spec.name} failed: {e}")
+                if errors:
+                    entry["error"] = "; ".join(errors)
+        report[name] = entry
+    return report
+
+
+class IndexManager:
+    """Runs `reconcile` in the background at startup and keeps its outcome."""
+
+    def __init__(self):
+        self.status = "pending"     # pending -> building -> ready | failed
+        self.report: dict = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db, specs: dict[str, list[IndexSpec]] = INDEX_SPECS):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db, specs))
+
+    async def _run(self, db, specs):
+        self.status = "building"
+        try:
+            self.report = await reconcile(db, specs)
+        except Exception as e:
+            self.status = "failed"
+            print(f"Index reconciliation failed: {e}")
+            return
+        failed = [name for name, entry in self.report.items() if "error" in entry]
+        self.status = "failed" if failed else "ready"
+        for name, entry in self.report.items():
+            if entry.get("built"):
+                print(f"Built indexes on {name}: {', '.join(entry['built'])}")
+            for conflict in entry["conflicting"]:
+                print(f"Index {name}.{conflict['name']} differs from its spec: "
+                      f"expected {conflict['expected']}, found {conflict['found']}")
+
+    async def stop(self):
+        # Builds already sent to the server finish there regardless
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+index_manager = IndexManager()
+
+
+async def index_usage(collection) -> dict[str, int]:
+    """Operations per index since the mongod (or each shard) last restarted."""
+    usage: dict[str, int] = {}
+    async for stat in collection.aggregate([{"$indexStats": {}}]):
+        usage[stat["name"]] = usage.get(stat["name"], 0) + stat["accesses"]["ops"]
+    return usage
+
+
+async def _report(apply: bool):
+    from .connection import db
+
+    report = await reconcile(db, build=apply)
+    for name, entry in report.items():
+        usage = await index_usage(db[name])
+        unused = sorted(n for n, ops in usage.items() if ops == 0 and n != "_id_")
+        print(f"{name}:")
+        if entry.get("built"):
+            print(f"  built:       {', '.join(entry['built'])}")
+        if entry.get("error"):
+            print(f"  build error: {entry['error']}")
+        for spec in INDEX_SPECS[name]:
+            if spec.name in entry["missing"]:
+                print(f"  missing:     {spec.name}  ({spec.reason})")
+        for conflict in entry["conflicting"]:
+            print(f"  conflicting: {conflict['name']}  expected {conflict['expected']}, found {conflict['found']}")
+        for index_name in entry["unmanaged"]:
+            print(f"  unmanaged:   {index_name}  ({usage.get(index_name, 0)} ops)")
+        for index_name in unused:
+            print(f"  unused:      {index_name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing and unused MongoDB indexes.")
+    parser.add_argument("--apply", action="store_true", help="build missing indexes before reporting")
+    asyncio.run(_report(parser.parse_args().apply))
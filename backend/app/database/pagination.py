@@ -0,0 +1,161 @@
+import base64
+import binascii
+from typing import Any, Awaitable, Callable, Optional
+import bson
+from bson import ObjectId
+from bson.errors import BSONError
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pymongo.errors import ExecutionTimeout
+from .connection import LIST_MAX_TIME_MS, for_lists
+from .serialization import FastJSONResponse, construct_items, dumps
+from ..services.profiling import timed_segment
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every list endpoint.
+
+    - limit:  page size (defaults to DEFAULT_PAGE_SIZE; uncapped when streaming)
+    - cursor: opaque value from a previous response's X-Next-Cursor header
+    - stream: return NDJSON, one document per line, straight off the Motor cursor
+    - fast:   skip response-model validation and serialize with orjson; documents
+              are trusted as stored (model validators do not run)
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None),
+        stream: bool = Query(False),
+        fast: bool = Query(False),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = stream
+        self.fast = fast
+
+
+def encode_cursor(last_id: ObjectId, sort_value: Any = None) -> str:
+    raw = bson.encode({"i": last_id, "v": sort_value})
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[ObjectId, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = bson.decode(raw)
+        if not isinstance(data.get("i"), ObjectId):
+            raise ValueError("cursor has no _id")
+        return data["i"], data.get("v")
+    except (binascii.Error, BSONError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_query(query: dict, cursor: Optional[str], sort_field: str, direction: int) -> dict:
+    if not cursor:
+        return query
+    last_id, last_value = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+    if sort_field == "_id":
+        after = {"_id": {op: last_id}}
+    else:
+        # Ties on the sort key are broken by _id, matching the (key, _id) sort
+        ties = {sort_field: last_value, "_id": {op: last_id}}
+        # Null and missing values sort before everything else, but a range
+        # query ($gt/$lt) only matches values of its own type, so rows past
+        # the null boundary need their own branch
+        if last_value is None:
+            after = {"$or": [ties, {sort_field: {"$ne": None}}]} if direction == 1 else ties
+        else:
+            later = [{sort_field: {op: last_value}}]
+            if direction == -1:
+                later.append({sort_field: None})
+            after = {"$or": [*later, ties]}
+    return {"$and": [query, after]} if query else after
+
+
+async def paginate(
+    collection,
+    query: dict,
+    page: PageParams,
+    response: Response,
+    transform: Callable[[dict], dict],
+    model: Optional[type[BaseModel]] = None,
+    projection: Optional[dict] = None,
+    sort_field: str = "_id",
+    direction: int = 1,
+    enrich: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
+):
+    """Run a keyset-paginated find ordered by (sort_field, _id).
+
+    Returns a list of transformed documents and sets X-Next-Cursor when more
+    rows exist, or a StreamingResponse of NDJSON when page.stream is set.
+    A projected page cannot satisfy the full response model, so it is
+    returned as a plain JSON response instead, as is a page.fast page.
+    `enrich` is awaited on the transformed page before the response is
+    built; streamed pages are not enriched, so callers reject that case.
+    """
+    find_query = _keyset_query(query, page.cursor, sort_field, direction)
+    sort = [("_id", direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    if projection is not None:
+        projection = {**projection, sort_field: 1}
+        model = None
+
+    # List queries may be routed to secondaries and get a server-side time
+    # limit (MONGO_LIST_READ_PREFERENCE / MONGO_LIST_MAX_TIME_MS)
+    collection = for_lists(collection)
+    if page.stream:
+        cursor = _find(collection, find_query, projection, sort)
+        if page.limit:
+            cursor = cursor.limit(page.limit)
+        return StreamingResponse(
+            _ndjson_lines(cursor, transform, model, page.fast),
+            media_type="application/x-ndjson",
+        )
+
+    limit = page.limit or DEFAULT_PAGE_SIZE
+    # Fetch one extra row to know whether another page exists
+    try:
+        docs = await _find(collection, find_query, projection, sort).to_list(limit + 1)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=503, detail="Query timed out")
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last["_id"], None if sort_field == "_id" else last.get(sort_field))
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    with timed_segment("serialization"):
+        items = [transform(d) for d in docs]
+    if enrich is not None:
+        await enrich(items)
+    if projection is not None or page.fast:
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        with timed_segment("serialization"):
+            items = construct_items(items, model)
+        return FastJSONResponse(content=items, headers=headers)
+    return items
+
+
+def _find(collection, query: dict, projection: Optional[dict], sort: list):
+    cursor = collection.find(query, projection).sort(sort)
+    if LIST_MAX_TIME_MS:
+        cursor = cursor.max_time_ms(LIST_MAX_TIME_MS)
+    return cursor
+
+
+async def _ndjson_lines(
+    cursor, transform: Callable[[dict], dict], model: Optional[type[BaseModel]], fast: bool = False
+):
+    async for doc in cursor:
+        item = transform(doc)
+        if model is not None and not fast:
+            yield model.model_validate(item).model_dump_json() + "\n"
+        else:
+            yield dumps(construct_items([item], model)[0]) + b"\n"
@@ -0,0 +1,83 @@
+from typing import Any, Optional
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from ..services.profiling import timed_segment
+
+
+# Types that may contain or be an ObjectId; everything else is left alone
+_NESTED = {ObjectId, dict, list}
+
+
+def _encode(value):
+    kind = type(value)
+    if kind is ObjectId:
+        return str(value)
+    if kind is dict:
+        return {k: _encode(v) for k, v in value.items()}
+    if kind is list and any(type(v) in _NESTED for v in value):
+        return [_encode(v) for v in value]
+    return value
+
+
+def doc_to_response(doc: Optional[dict]) -> Optional[dict]:
+    """Convert a MongoDB document to a JSON-ready dict, in place.
+
+    _id becomes a string `id` and ObjectIds anywhere in the document become
+    strings. datetimes are kept: pydantic and orjson both write them as ISO 8601.
+    """
+    if not doc:
+        return doc
+    if "_id" in doc:
+        doc["id"] = str(doc.pop("_id"))
+    for key, value in doc.items():
+        if type(value) in _NESTED:
+            doc[key] = _encode(value)
+    return doc
+
+
+def _default(value):
+    # Values doc_to_response does not know about (Decimal128, bytes, ...)
+    return str(value)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content) -> bytes:
+        with timed_segment("serialization"):
+            return dumps(content)
+
+
+_field_defaults: dict[type, list[tuple[str, bool, Any]]] = {}
+
+
+def _fields(model: type[BaseModel]) -> list[tuple[str, bool, Any]]:
+    fields = _field_defaults.get(model)
+    if fields is None:
+        fields = _field_defaults[model] = [
+            (name, info.is_required(), None if info.is_required() else info.get_default(call_default_factory=True))
+            for name, info in model.model_fields.items()
+        ]
+    return fields
+
+
+def construct_items(items: list[dict], model: Optional[type[BaseModel]]) -> list[dict]:
+    """Shape trusted, already JSON-ready documents like `model` without validating them.
+
+    Equivalent to model_construct(**item).__dict__ (model fields only, defaults
+    filled in) without building the instances; validators do not run.
+    """
+    if model is None:
+        return items
+    fields = _fields(model)
+    return [
+        {name: item[name] if name in item else default
+         for name, required, default in fields if not required or name in item}
+        for item in items
+    ]
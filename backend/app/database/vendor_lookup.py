@@ -0,0 +1,69 @@
+"""Vendor lookup by vendor_id, which lives either at the top level or under vendor_profile.
+
+Both paths are indexed on vendors and internal_vendors (see database/indexes.py).
+"""
+from typing import AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+from .serialization import dumps
+
+VENDOR_ID_PATHS = ("vendor_id", "vendor_profile.vendor_id")
+VENDOR_ID_BATCH_SIZE = 10000
+
+
+async def find_by_vendor_id(collection, vid: str) -> Optional[dict]:
+    """One indexed $or query over both vendor_id paths.
+
+    A top-level match wins over a nested one, as with the old two-step lookup;
+    the matches are ranked server-side (like GET /vendors/{vid}/full) because
+    several nested matches could otherwise crowd it out of a short list.
+    """
+    docs = await collection.aggregate([
+        {"$match": {"$or": [{path: vid} for path in VENDOR_ID_PATHS]}},
+        {"$addFields": {"_top_level": {"$eq": ["$vendor_id", vid]}}},
+        {"$sort": {"_top_level": -1}},
+        {"$limit": 1},
+        {"$project": {"_top_level": 0}},
+    ]).to_list(1)
+    return docs[0] if docs else None
+
+
+async def iter_vendor_ids(collection) -> AsyncIterator[str]:
+    """Every document's vendor_id (top-level, else vendor_profile.vendor_id), uncapped.
+
+    Top-level ids come from a covered scan of the vendor_id index (only index
+    keys are read). Nested-only ids come from the sparse vendor_profile.vendor_id
+    index; both project just the id, so whole documents never cross the wire.
+    """
+    top_level = collection.find(
+        {"vendor_id": {"$type": "string"}}, {"_id": 0, "vendor_id": 1}
+    ).sort("vendor_id", 1).batch_size(VENDOR_ID_BATCH_SIZE)
+    async for doc in top_level:
+        yield doc["vendor_id"]
+
+    nested_only = collection.find(
+        {"vendor_profile.vendor_id": {"$type": "string"}, "vendor_id": {"$exists": False}},
+        {"_id": 0, "vendor_profile.vendor_id": 1},
+    ).sort("vendor_profile.vendor_id", 1).batch_size(VENDOR_ID_BATCH_SIZE)
+    async for doc in nested_only:
+        yield doc["vendor_profile"]["vendor_id"]
+
+
+def vendor_ids_response(collection, /, **extra) -> StreamingResponse:
+    """Stream {"vendor_ids": [...], "total": n, **extra} as it is read."""
+
+    async def body():
+        total = 0
+        chunk = []
+        yield b'{"vendor_ids":['
+        async for vendor_id in iter_vendor_ids(collection):
+            chunk.append(dumps(vendor_id))
+            total += 1
+            if len(chunk) == VENDOR_ID_BATCH_SIZE:
+                yield (b"," if total > len(chunk) else b"") + b",".join(chunk)
+                chunk = []
+        if chunk:
+            yield (b"," if total > len(chunk) else b"") + b",".join(chunk)
+        tail = {"total": total, **extra}
+        yield b"]," + dumps(tail)[1:]
+
+    return StreamingResponse(body(), media_type="application/json")
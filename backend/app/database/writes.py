@@ -0,0 +1,20 @@
+from typing import Optional
+from fastapi.responses import JSONResponse
+
+PREFER_MINIMAL = "return=minimal"
+
+
+def wants_minimal(prefer: Optional[str]) -> bool:
+    """True when the client sent `Prefer: return=minimal` (RFC 7240)."""
+    if not prefer:
+        return False
+    return any(p.strip().lower() == PREFER_MINIMAL for p in prefer.split(","))
+
+
+def minimal_response(doc_id, status_code: int = 200) -> JSONResponse:
+    """Body with just the document id, for clients that don't need the representation."""
+    return JSONResponse(
+        status_code=status_code,
+        content={"id": str(doc_id)},
+        headers={"Preference-Applied": PREFER_MINIMAL},
+    )
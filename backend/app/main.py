@@ -1,15 +1,75 @@
 import os
+import asyncio
 import traceback
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from .routers import vendor_compliances, email_threads, messages, vendors, send_document, upload, s3_upload, lyzr_proxy, contracts, internal_vendors
-from .database.connection import ping_db, vendors_collection, email_threads_collection, contracts_collection, internal_vendors_collection
+from fastapi.responses import JSONResponse, Response
+from pymongo.errors import DuplicateKeyError
+from .routers import vendor_compliances, email_threads, messages, vendors, send_document, upload, s3_upload, lyzr_proxy, contracts, internal_vendors, realtime, cache, analytics, search
+from .database.pagination import NEXT_CURSOR_HEADER
+from .database.indexes import index_manager
+from .services.realtime import hub, MongoChangeStreamSource
+from .services.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from .services.profiling import ProfilingMiddleware, profiling_enabled
+from .services.cache import REDIS_URL, RedisCacheBackend, response_cache
+from .services.startup import startup_report
+from .database import connection
+from .database.connection import db, ping_db, supports_transactions
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create clients and start background work; each step is timed for GET /ready.
+
+    Nothing here waits on large collections: index builds and search warm-up
+    run in the background.
+    """
+    startup_report.begin()
+    async with startup_report.phase("mongodb_client", required=True):
+        # Built from the MONGO_* settings (see database/connection.py); invalid ones stop startup
+        connection.connect()
+    async with startup_report.phase("index_builds"):
+        index_manager.start(db)
+    async with startup_report.phase("http_clients"):
+        await lyzr_proxy.start_client()
+    async with startup_report.phase("response_cache"):
+        if REDIS_URL:
+            try:
+                response_cache.use_backend(await RedisCacheBackend.from_url(REDIS_URL))
+            except Exception as e:
+                print(f"Redis response cache unavailable, using in-process cache: {e}")
+    change_streams = False
+    async with startup_report.phase("change_stream"):
+        # Change streams, like transactions, need a replica set or sharded cluster
+        change_streams = await supports_transactions()
+        if change_streams:
+            await hub.start(MongoChangeStreamSource(db))
+        else:
+            print("Change streams unavailable on a standalone MongoDB; realtime updates disabled, "
+                  "search indexes reload every SEARCH_INDEX_TTL seconds")
+    async with startup_report.phase("search_warmup"):
+        if change_streams:
+            # Opens the change stream first, then loads, so no write falls in between
+            search.search_service.follow(db)
+        else:
+            asyncio.create_task(search.search_service.warm())
+    startup_report.finish()
+
+    yield
+
+    await hub.stop()
+    await search.search_service.stop()
+    await index_manager.stop()
+    await lyzr_proxy.close_client()
+    # Last, so the steps above can still use the client
+    connection.close()
+
 
 app = FastAPI(
     title="Procurement Automation API",
     description="Backend API for procurement automation - vendor compliances, email threads, and messages",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS: allow localhost + any Vercel preview/production URLs
@@ -28,8 +88,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Preference-Applied", "ETag", "X-Cache", "Server-Timing", "X-Profile-Id"],
 )
 
+# Opt-in request profiling (PROFILE_TOKEN / PROFILE_SAMPLE_RATE); not installed otherwise
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency, status and size metrics, exposed on GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(DuplicateKeyError)
+async def duplicate_key_handler(request: Request, exc: DuplicateKeyError):
+    # A unique index (see database/indexes.py) rejected the write
+    key = ", ".join(f"{k}={v!r}" for k, v in (exc.details or {}).get("keyValue", {}).items())
+    return JSONResponse(
+        status_code=409,
+        content={"detail": f"Duplicate key: {key}" if key else "Duplicate key"},
+    )
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -49,29 +127,10 @@ app.include_router(send_document.router, prefix="/api")
 app.include_router(upload.router, prefix="/api")
 app.include_router(s3_upload.router, prefix="/api")
 app.include_router(lyzr_proxy.router, prefix="/api")
-
-
-@app.on_event("startup")
-async def create_indexes():
-    try:
-        await vendors_collection.create_index("vendor_id", unique=True)
-    except Exception as e:
-        print(f"Index creation for vendors_collection failed: {e}")
-    
-    try:
-        await email_threads_collection.create_index("vendor_id")
-    except Exception as e:
-        print(f"Index creation for email_threads_collection failed: {e}")
-    
-    try:
-        await contracts_collection.create_index("contract_id", unique=False)
-    except Exception as e:
-        print(f"Index creation for contracts_collection failed: {e}")
-    
-    try:
-        await internal_vendors_collection.create_index("vendor_id", unique=False)
-    except Exception as e:
-        print(f"Index creation for internal_vendors_collection failed: {e}")
+app.include_router(realtime.router, prefix="/api")
+app.include_router(cache.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
 
 
 @app.get("/")
@@ -86,3 +145,26 @@ async def health_check():
         return {"status": "healthy", "database": "connected"}
     except Exception:
         return {"status": "unhealthy", "database": "disconnected"}
+
+
+@app.get("/ready")
+async def readiness():
+    """Startup phase timings, background index build status and a database ping.
+
+    503 until startup has finished and while the database is unreachable.
+    """
+    report = startup_report.as_dict()
+    report["indexes"] = index_manager.status
+    try:
+        await ping_db()
+        report["database"] = "connected"
+    except Exception:
+        report["database"] = "disconnected"
+    ready = report["ready"] and report["database"] == "connected"
+    return JSONResponse(status_code=200 if ready else 503, content=report)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (this worker's metrics)."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -22,3 +22,4 @@ class MessageResponse(BaseModel):
     attachment: list[str] = []
     thread_id: str
     sender: str = "vendor"
+    attachment_urls: Optional[dict[str, str]] = None  # attachment -> presigned URL, only with ?presign=true
@@ -0,0 +1,201 @@
+import os
+import asyncio
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Query, Request, Response
+from ..database.connection import contracts_collection, vendor_compliances_collection
+from ..services.cache import response_cache
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+# Aggregates are cached briefly. They share the "contracts" / "vendor_compliances"
+# namespaces, so writes that invalidate those lists refresh these too.
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+
+EXPIRING_FIELDS = ("contract_id", "vendor_id", "vendor_name", "department", "contract_status",
+                   "contract_value_usd", "contract_end_date")
+
+
+def count_by_pipeline(field: str) -> list:
+    """Counts per value of `field`.
+
+    The leading $sort on a compound index's first key lets the server answer
+    the $group from the index alone (covered scan, no document fetch).
+    """
+    return [
+        {"$sort": {field: 1}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$project": {"_id": 0, field: "$_id", "count": 1}},
+    ]
+
+
+def spend_pipeline() -> list:
+    """Totals and spend by department in a single collection scan."""
+    return [
+        {"$project": {"department": 1, "contract_value_usd": 1, "monthly_cost_usd": 1}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "contracts": {"$sum": 1},
+                    "total_value_usd": {"$sum": "$contract_value_usd"},
+                    "monthly_cost_usd": {"$sum": "$monthly_cost_usd"},
+                }},
+                {"$project": {"_id": 0}},
+            ],
+            "by_department": [
+                {"$group": {
+                    "_id": "$department",
+                    "contracts": {"$sum": 1},
+                    "total_value_usd": {"$sum": "$contract_value_usd"},
+                    "monthly_cost_usd": {"$sum": "$monthly_cost_usd"},
+                }},
+                {"$sort": {"total_value_usd": -1}},
+                {"$project": {"_id": 0, "department": "$_id", "contracts": 1,
+                              "total_value_usd": 1, "monthly_cost_usd": 1}},
+            ],
+        }},
+    ]
+
+
+def expiring_pipeline(within_days: int, limit: int, today: Optional[date] = None) -> list:
+    """Contracts whose end date falls in the next `within_days` days, soonest first.
+
+    Dates are stored as YYYY-MM-DD strings, so a string range matches the
+    (contract_end_date, _id) index.
+    """
+    today = today or date.today()
+    cutoff = today + timedelta(days=within_days)
+    return [
+        {"$match": {"contract_end_date": {"$gte": today.isoformat(), "$lte": cutoff.isoformat()}}},
+        {"$sort": {"contract_end_date": 1, "_id": 1}},
+        {"$facet": {
+            "count": [{"$count": "n"}],
+            "contracts": [
+                {"$limit": limit},
+                {"$project": {"_id": 0, **{f: 1 for f in EXPIRING_FIELDS}}},
+            ],
+        }},
+    ]
+
+
+def compliance_pipeline(vendor_id: Optional[str], top: int) -> list:
+    """Response totals, per-vendor quote stats and most submitted certifications."""
+    match = [{"$match": {"vendor_id": vendor_id}}] if vendor_id else []
+    return match + [
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "responses": {"$sum": 1},
+                    "technically_compliant": {"$sum": {"$cond": ["$technical_compliance_status", 1, 0]}},
+                    "esg_declared": {"$sum": {"$cond": ["$esg_declaration", 1, 0]}},
+                    "avg_quoted_price": {"$avg": "$quoted_price"},
+                    "min_quoted_price": {"$min": "$quoted_price"},
+                    "max_quoted_price": {"$max": "$quoted_price"},
+                }},
+                {"$project": {"_id": 0}},
+            ],
+            "by_vendor": [
+                {"$group": {
+                    "_id": "$vendor_id",
+                    "responses": {"$sum": 1},
+                    "technically_compliant": {"$sum": {"$cond": ["$technical_compliance_status", 1, 0]}},
+                    "avg_quoted_price": {"$avg": "$quoted_price"},
+                    "min_quoted_price": {"$min": "$quoted_price"},
+                }},
+                {"$sort": {"min_quoted_price": 1, "_id": 1}},
+                {"$limit": top},
+                {"$project": {"_id": 0, "vendor_id": "$_id", "responses": 1, "technically_compliant": 1,
+                              "avg_quoted_price": 1, "min_quoted_price": 1}},
+            ],
+            "certifications": [
+                {"$unwind": "$certifications_submitted"},
+                {"$group": {"_id": "$certifications_submitted", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": top},
+                {"$project": {"_id": 0, "certificate": "$_id", "count": 1}},
+            ],
+        }},
+    ]
+
+
+async def _aggregate(collection, pipeline: list) -> list:
+    return await collection.aggregate(pipeline).to_list(None)
+
+
+async def _expiring(within_days: int, limit: int) -> dict:
+    facet = (await _aggregate(contracts_collection, expiring_pipeline(within_days, limit)))[0]
+    return {
+        "within_days": within_days,
+        "count": facet["count"][0]["n"] if facet["count"] else 0,
+        "contracts": facet["contracts"],
+    }
+
+
+# GET - Contract book summary for dashboards
+@router.get("/contracts/summary")
+async def get_contract_summary(
+    request: Request,
+    response: Response,
+    expiring_within_days: int = Query(90, ge=1, le=3650),
+    expiring_limit: int = Query(20, ge=1, le=500),
+):
+    """Totals, spend by department, counts by contract_status and risk_level,
+    and contracts expiring soon. Independent pipelines run concurrently."""
+
+    async def produce():
+        by_status, by_risk, spend, expiring = await asyncio.gather(
+            _aggregate(contracts_collection, count_by_pipeline("contract_status")),
+            _aggregate(contracts_collection, count_by_pipeline("risk_level")),
+            _aggregate(contracts_collection, spend_pipeline()),
+            _expiring(expiring_within_days, expiring_limit),
+        )
+        spend = spend[0]
+        totals = spend["totals"][0] if spend["totals"] else {"contracts": 0, "total_value_usd": 0, "monthly_cost_usd": 0}
+        return {
+            "totals": totals,
+            "by_status": by_status,
+            "by_risk_level": by_risk,
+            "spend_by_department": spend["by_department"],
+            "expiring_soon": expiring,
+        }
+
+    return await response_cache.serve(request, response, "contracts", produce, ttl=ANALYTICS_CACHE_TTL)
+
+
+# GET - Contracts expiring soon
+@router.get("/contracts/expiring")
+async def get_expiring_contracts(
+    request: Request,
+    response: Response,
+    within_days: int = Query(90, ge=1, le=3650),
+    limit: int = Query(100, ge=1, le=5000),
+):
+    return await response_cache.serve(
+        request, response, "contracts", lambda: _expiring(within_days, limit), ttl=ANALYTICS_CACHE_TTL
+    )
+
+
+# GET - Vendor compliance response summary
+@router.get("/compliance/summary")
+async def get_compliance_summary(
+    request: Request,
+    response: Response,
+    vendor_id: Optional[str] = None,
+    top: int = Query(20, ge=1, le=500),
+):
+    """Compliance and quote statistics over vendor_compliances, optionally for one vendor."""
+
+    async def produce():
+        facet = (await _aggregate(vendor_compliances_collection, compliance_pipeline(vendor_id, top)))[0]
+        totals = facet["totals"][0] if facet["totals"] else {
+            "responses": 0, "technically_compliant": 0, "esg_declared": 0,
+            "avg_quoted_price": None, "min_quoted_price": None, "max_quoted_price": None,
+        }
+        return {"totals": totals, "by_vendor": facet["by_vendor"], "certifications": facet["certifications"]}
+
+    return await response_cache.serve(
+        request, response, "vendor_compliances", produce, ttl=ANALYTICS_CACHE_TTL
+    )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from ..services.cache import response_cache
+
+router = APIRouter(prefix="/cache", tags=["Cache"])
+
+
+@router.get("/metrics")
+async def get_cache_metrics():
+    """Response cache hits, misses, 304s and invalidations for this worker."""
+    return response_cache.get_metrics()
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 from bson import ObjectId
+from pymongo import ReturnDocument
 from ..database.connection import contracts_collection
+from ..database.bulk import read_bulk_body, run_bulk
+from ..database.pagination import PageParams, paginate
+from ..database.writes import minimal_response, wants_minimal
+from ..database.serialization import doc_to_response
+from ..services.cache import response_cache
 from ..models.contract import (
     ContractCreate,
     ContractUpdate,
@@ -11,24 +19,135 @@ from ..models.contract import (
 router = APIRouter(prefix="/contracts", tags=["Contracts"])
 
 
-def doc_to_response(doc: dict) -> dict:
-    doc["id"] = str(doc.pop("_id"))
-    return doc
-
-
 # PUT - Create a new contract
 @router.put("/", response_model=ContractResponse)
-async def create_contract(data: ContractCreate):
-    result = await contracts_collection.insert_one(data.model_dump())
-    created = await contracts_collection.find_one({"_id": result.inserted_id})
-    return doc_to_response(created)
+async def create_contract(data: ContractCreate, prefer: Optional[str] = Header(None)):
+    doc = data.model_dump()
+    await contracts_collection.insert_one(doc)  # insert_one sets doc["_id"]
+    await response_cache.invalidate("contracts")
+    if wants_minimal(prefer):
+        return minimal_response(doc["_id"])
+    return doc_to_response(doc)
 
 
-# GET - Get all contracts
+# Fields that may be used with ?sort= (prefix with "-" for descending)
+SORTABLE_FIELDS = {
+    "contract_id",
+    "vendor_name",
+    "contract_value_usd",
+    "monthly_cost_usd",
+    "contract_start_date",
+    "contract_end_date",
+}
+
+
+def build_contract_filter(
+    vendor_id: Optional[str],
+    contract_status: Optional[str],
+    department: Optional[str],
+    business_unit: Optional[str],
+    risk_level: Optional[str],
+    service_category: Optional[str],
+    start_date_from: Optional[date],
+    start_date_to: Optional[date],
+    end_date_from: Optional[date],
+    end_date_to: Optional[date],
+    min_value: Optional[float],
+    max_value: Optional[float],
+) -> dict:
+    """Translate contract list query params into a MongoDB filter.
+
+    Contract dates are stored as ISO "YYYY-MM-DD" strings, so range bounds
+    compare as strings.
+    """
+    query = {}
+    exact = {
+        "vendor_id": vendor_id,
+        "contract_status": contract_status,
+        "department": department,
+        "business_unit": business_unit,
+        "risk_level": risk_level,
+        "service_category": service_category,
+    }
+    query.update({k: v for k, v in exact.items() if v is not None})
+
+    ranges = {
+        "contract_start_date": (start_date_from, start_date_to),
+        "contract_end_date": (end_date_from, end_date_to),
+        "contract_value_usd": (min_value, max_value),
+    }
+    for field, (low, high) in ranges.items():
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low.isoformat() if isinstance(low, date) else low
+        if high is not None:
+            bounds["$lte"] = high.isoformat() if isinstance(high, date) else high
+        if bounds:
+            query[field] = bounds
+    return query
+
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """Turn ?fields=a,b,c into a projection, rejecting unknown field names."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [n for n in names if n != "id" and n not in ContractResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {n: 1 for n in names if n != "id"}
+
+
+# GET - Get all contracts (filterable, sortable, with optional field projection)
 @router.get("/", response_model=list[ContractResponse])
-async def get_all_contracts():
-    docs = await contracts_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_contracts(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    vendor_id: Optional[str] = None,
+    contract_status: Optional[str] = None,
+    department: Optional[str] = None,
+    business_unit: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    service_category: Optional[str] = None,
+    start_date_from: Optional[date] = None,
+    start_date_to: Optional[date] = None,
+    end_date_from: Optional[date] = None,
+    end_date_to: Optional[date] = None,
+    min_value: Optional[float] = Query(None, ge=0),
+    max_value: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, description="Field to sort by; prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+):
+    query = build_contract_filter(
+        vendor_id, contract_status, department, business_unit, risk_level, service_category,
+        start_date_from, start_date_to, end_date_from, end_date_to, min_value, max_value,
+    )
+
+    sort_field, direction = "_id", 1
+    if sort:
+        sort_field, direction = (sort[1:], -1) if sort.startswith("-") else (sort, 1)
+        if sort_field not in SORTABLE_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Cannot sort by '{sort_field}'")
+
+    return await response_cache.serve(
+        request, response, "contracts",
+        lambda: paginate(
+            contracts_collection, query, page, response, doc_to_response, ContractResponse,
+            projection=parse_fields(fields), sort_field=sort_field, direction=direction,
+        ),
+        ContractResponse,
+    )
+
+
+# POST - Bulk create/upsert/update/delete contracts (JSON array or NDJSON body)
+@router.post("/bulk")
+async def bulk_contracts(request: Request):
+    """Apply many operations in chunked bulk_writes; returns a per-item report. Upserts without an id match on contract_id."""
+    ops = await read_bulk_body(request)
+    result = await run_bulk(contracts_collection, ops, ContractCreate, ContractUpdate, natural_key="contract_id")
+    await response_cache.invalidate("contracts")
+    return result
 
 
 # GET - Get a single contract by MongoDB _id
@@ -53,32 +172,44 @@ async def get_contract_by_id(cid: str):
 
 # POST - Update (full replace) a contract
 @router.post("/{contract_id}", response_model=ContractResponse)
-async def update_contract(contract_id: str, data: ContractCreate):
+async def update_contract(contract_id: str, data: ContractCreate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(contract_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = await contracts_collection.replace_one(
-        {"_id": ObjectId(contract_id)}, data.model_dump()
+    if wants_minimal(prefer):
+        result = await contracts_collection.replace_one({"_id": ObjectId(contract_id)}, data.model_dump())
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Contract not found")
+        await response_cache.invalidate("contracts")
+        return minimal_response(contract_id)
+    doc = await contracts_collection.find_one_and_replace(
+        {"_id": ObjectId(contract_id)}, data.model_dump(), return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Contract not found")
-    doc = await contracts_collection.find_one({"_id": ObjectId(contract_id)})
+    await response_cache.invalidate("contracts")
     return doc_to_response(doc)
 
 
 # PATCH - Partially update a contract
 @router.patch("/{contract_id}", response_model=ContractResponse)
-async def patch_contract(contract_id: str, data: ContractUpdate):
+async def patch_contract(contract_id: str, data: ContractUpdate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(contract_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await contracts_collection.update_one(
-        {"_id": ObjectId(contract_id)}, {"$set": update_data}
+    if wants_minimal(prefer):
+        result = await contracts_collection.update_one({"_id": ObjectId(contract_id)}, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Contract not found")
+        await response_cache.invalidate("contracts")
+        return minimal_response(contract_id)
+    doc = await contracts_collection.find_one_and_update(
+        {"_id": ObjectId(contract_id)}, {"$set": update_data}, return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Contract not found")
-    doc = await contracts_collection.find_one({"_id": ObjectId(contract_id)})
+    await response_cache.invalidate("contracts")
     return doc_to_response(doc)
 
 
@@ -90,6 +221,7 @@ async def delete_contract(contract_id: str):
     result = await contracts_collection.delete_one({"_id": ObjectId(contract_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contract not found")
+    await response_cache.invalidate("contracts")
     return {"message": "Contract deleted successfully"}
 
 
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from ..database.connection import email_threads_collection
+from ..database.bulk import read_bulk_body, run_bulk
+from ..database.pagination import PageParams, paginate
+from ..database.writes import minimal_response, wants_minimal
+from ..database.serialization import doc_to_response
 from ..models.email_thread import (
+    _normalize_certs,
     EmailThreadCreate,
     EmailThreadUpdate,
     EmailThreadResponse,
@@ -16,34 +23,51 @@ class UpdateCertStatusRequest(BaseModel):
     field: str          # "mandatory" or "good_to_have"
     is_submitted: str   # e.g. "VALID", "NOT_VALID", "UNABLE_TO_VERIFY"
 
-router = APIRouter(prefix="/email-threads", tags=["Email Threads"])
+class CertStatusEntry(BaseModel):
+    certificate: str
+    field: str          # "mandatory" or "good_to_have"
+    is_submitted: str
 
 
-def doc_to_response(doc: dict) -> dict:
-    doc["id"] = str(doc.pop("_id"))
-    return doc
+class BatchCertStatusRequest(BaseModel):
+    thread_id: str
+    updates: list[CertStatusEntry]
+
+router = APIRouter(prefix="/email-threads", tags=["Email Threads"])
 
 
 # PUT - Create a new email thread
 @router.put("/", response_model=EmailThreadResponse)
-async def create_email_thread(data: EmailThreadCreate):
-    result = await email_threads_collection.insert_one(data.model_dump())
-    created = await email_threads_collection.find_one({"_id": result.inserted_id})
-    return doc_to_response(created)
+async def create_email_thread(data: EmailThreadCreate, prefer: Optional[str] = Header(None)):
+    doc = data.model_dump()
+    await email_threads_collection.insert_one(doc)  # insert_one sets doc["_id"]
+    if wants_minimal(prefer):
+        return minimal_response(doc["_id"])
+    return doc_to_response(doc)
 
 
 # GET - Get all email threads
 @router.get("/", response_model=list[EmailThreadResponse])
-async def get_all_email_threads():
-    docs = await email_threads_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_email_threads(response: Response, page: PageParams = Depends()):
+    return await paginate(email_threads_collection, {}, page, response, doc_to_response, EmailThreadResponse)
+
+
+# POST - Bulk create/upsert/update/delete email threads (JSON array or NDJSON body)
+@router.post("/bulk")
+async def bulk_email_threads(request: Request):
+    """Apply many operations in chunked bulk_writes; returns a per-item report. Upserts without an id match on thread_id."""
+    ops = await read_bulk_body(request)
+    return await run_bulk(email_threads_collection, ops, EmailThreadCreate, EmailThreadUpdate, natural_key="thread_id")
 
 
 # GET - Get all threads for a vendor (query param to support URL-based vendor_ids)
 @router.get("/by-vendor", response_model=list[EmailThreadResponse])
-async def get_threads_by_vendor(vendor_id: str = Query(...)):
-    docs = await email_threads_collection.find({"vendor_id": vendor_id}).to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_threads_by_vendor(
+    response: Response, vendor_id: str = Query(...), page: PageParams = Depends()
+):
+    return await paginate(
+        email_threads_collection, {"vendor_id": vendor_id}, page, response, doc_to_response, EmailThreadResponse
+    )
 
 
 # GET - Get a single email thread by ID
@@ -59,15 +83,19 @@ async def get_email_thread(thread_id: str):
 
 # POST - Update (full replace) an email thread
 @router.post("/{thread_id}", response_model=EmailThreadResponse)
-async def update_email_thread(thread_id: str, data: EmailThreadCreate):
+async def update_email_thread(thread_id: str, data: EmailThreadCreate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(thread_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = await email_threads_collection.replace_one(
-        {"_id": ObjectId(thread_id)}, data.model_dump()
+    if wants_minimal(prefer):
+        result = await email_threads_collection.replace_one({"_id": ObjectId(thread_id)}, data.model_dump())
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Email thread not found")
+        return minimal_response(thread_id)
+    doc = await email_threads_collection.find_one_and_replace(
+        {"_id": ObjectId(thread_id)}, data.model_dump(), return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Email thread not found")
-    doc = await email_threads_collection.find_one({"_id": ObjectId(thread_id)})
     return doc_to_response(doc)
 
 
@@ -84,18 +112,22 @@ async def delete_email_thread(thread_id: str):
 
 # PATCH - Partially update an email thread
 @router.patch("/{thread_id}", response_model=EmailThreadResponse)
-async def patch_email_thread(thread_id: str, data: EmailThreadUpdate):
+async def patch_email_thread(thread_id: str, data: EmailThreadUpdate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(thread_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await email_threads_collection.update_one(
-        {"_id": ObjectId(thread_id)}, {"$set": update_data}
+    if wants_minimal(prefer):
+        result = await email_threads_collection.update_one({"_id": ObjectId(thread_id)}, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Email thread not found")
+        return minimal_response(thread_id)
+    doc = await email_threads_collection.find_one_and_update(
+        {"_id": ObjectId(thread_id)}, {"$set": update_data}, return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Email thread not found")
-    doc = await email_threads_collection.find_one({"_id": ObjectId(thread_id)})
     return doc_to_response(doc)
 
 
@@ -114,6 +146,73 @@ async def update_cert_status(data: UpdateCertStatusRequest):
     return {"message": "Certificate status updated", "thread_id": data.thread_id, "certificate": data.certificate, "is_submitted": data.is_submitted}
 
 
+async def _set_cert_statuses(thread_id: str, latest: dict, fields: set, projection: dict):
+    """$set is_submitted on the given array fields; None if the thread is missing or a field isn't an array."""
+    set_ops = {}
+    array_filters = []
+    for i, ((field, certificate), is_submitted) in enumerate(latest.items()):
+        if field in fields:
+            set_ops[f"{field}.$[c{i}].is_submitted"] = is_submitted
+            array_filters.append({f"c{i}.certificate": certificate})
+    return await email_threads_collection.find_one_and_update(
+        {"thread_id": thread_id, **{field: {"$type": "array"} for field in fields}},
+        {"$set": set_ops},
+        array_filters=array_filters,
+        projection=projection,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+# PUT - Update many certification statuses in a thread with one atomic update
+@router.put("/cert-status/batch")
+async def update_cert_statuses(data: BatchCertStatusRequest):
+    bad_fields = {u.field for u in data.updates} - {"mandatory", "good_to_have"}
+    if bad_fields:
+        raise HTTPException(status_code=400, detail="field must be 'mandatory' or 'good_to_have'")
+    if not data.updates:
+        raise HTTPException(status_code=400, detail="No certificate updates given")
+
+    # Last entry wins when the same certificate appears twice; two array
+    # filters on one element would make the update conflict
+    latest = {(u.field, u.certificate): u.is_submitted for u in data.updates}
+
+    # One atomic update; the $type guards keep array filters off legacy
+    # threads where a field is missing or null (that would fail the update)
+    cert_fields = {"_id": 0, "mandatory": 1, "good_to_have": 1}
+    requested = {field for field, _ in latest}
+    doc = await _set_cert_statuses(data.thread_id, latest, requested, cert_fields)
+    applied = doc is not None
+    if not applied:
+        # Either no such thread, or a legacy one: retry on the fields that are arrays
+        doc = await email_threads_collection.find_one({"thread_id": data.thread_id}, cert_fields)
+        if doc is None:  # {} is a thread without either array
+            raise HTTPException(status_code=404, detail="Thread not found")
+        array_fields = {field for field in requested if isinstance(doc.get(field), list)}
+        if array_fields:
+            updated = await _set_cert_statuses(data.thread_id, latest, array_fields, cert_fields)
+            if updated is not None:
+                doc, applied = updated, True
+
+    # Plain-string entries (and missing arrays) can't be matched either
+    present = {
+        (field, c.get("certificate"))
+        for field in ("mandatory", "good_to_have")
+        for c in doc.get(field) or []
+        if isinstance(c, dict)
+    } if applied else set()
+    unmatched = [
+        {"certificate": certificate, "field": field}
+        for field, certificate in latest if (field, certificate) not in present
+    ]
+    return {
+        "message": "Certificate statuses updated",
+        "thread_id": data.thread_id,
+        "mandatory": _normalize_certs(doc.get("mandatory")),
+        "good_to_have": _normalize_certs(doc.get("good_to_have")),
+        "unmatched": unmatched,
+    }
+
+
 # OPTIONS - Return allowed methods
 @router.options("/")
 async def options_email_threads():
@@ -1,23 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from bson import ObjectId
 from ..database.connection import internal_vendors_collection
+from ..database.pagination import PageParams, paginate
+from ..database.vendor_lookup import find_by_vendor_id, vendor_ids_response
+from ..database.serialization import doc_to_response
+from ..services.cache import response_cache
 
 router = APIRouter(prefix="/internal-vendors", tags=["Internal Vendors"])
 
 
-def doc_to_response(doc: dict) -> dict:
-    """Convert MongoDB document to response by converting _id to id"""
-    if doc and "_id" in doc:
-        doc["id"] = str(doc.pop("_id"))
-    return doc
-
-
 # GET - Get all internal vendors
 @router.get("/")
-async def get_all_internal_vendors():
-    """Fetch all internal vendors"""
-    docs = await internal_vendors_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_internal_vendors(request: Request, response: Response, page: PageParams = Depends()):
+    """Fetch internal vendors, one keyset page at a time (see X-Next-Cursor).
+
+    Served from the response cache; the collection is only written outside the API,
+    so entries expire after RESPONSE_CACHE_TTL.
+    """
+    return await response_cache.serve(
+        request, response, "internal_vendors",
+        lambda: paginate(internal_vendors_collection, {}, page, response, doc_to_response),
+    )
 
 
 # GET - Get vendor by MongoDB _id
@@ -36,14 +39,8 @@ async def get_internal_vendor(vendor_id: str):
 @router.get("/by-vendor-id/{vid}")
 async def get_internal_vendor_by_vendor_id(vid: str):
     """Get internal vendor by vendor_id field with flexible search"""
-    # Try to find vendor with vendor_id at top level
-    doc = await internal_vendors_collection.find_one({"vendor_id": vid})
-    
-    # If not found, try nested in vendor_profile
-    if not doc:
-        doc = await internal_vendors_collection.find_one({"vendor_profile.vendor_id": vid})
-    
-    # If still not found, return placeholder with "Data Not Available" status
+    doc = await find_by_vendor_id(internal_vendors_collection, vid)
+
     if not doc:
         return {
             "id": None,
@@ -68,20 +65,5 @@ async def get_internal_vendor_by_vendor_id(vid: str):
 # GET - Get all vendor IDs for debugging
 @router.get("/search/all-ids")
 async def get_all_internal_vendor_ids():
-    """Get all available vendor IDs in the internal_vendors collection"""
-    docs = await internal_vendors_collection.find().to_list(1000)
-    vendor_ids = []
-    
-    for doc in docs:
-        # Check for vendor_id at top level
-        if "vendor_id" in doc:
-            vendor_ids.append(doc["vendor_id"])
-        # Check for vendor_id in nested vendor_profile
-        elif "vendor_profile" in doc and "vendor_id" in doc["vendor_profile"]:
-            vendor_ids.append(doc["vendor_profile"]["vendor_id"])
-    
-    return {
-        "total": len(vendor_ids),
-        "vendor_ids": vendor_ids,
-        "collection": "internal_vendors"
-    }
+    """Every vendor_id in the collection, streamed from the vendor_id indexes (no row cap)"""
+    return vendor_ids_response(internal_vendors_collection, collection="internal_vendors")
@@ -1,34 +1,113 @@
 import os
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from typing import Optional
 import httpx
 from fastapi import APIRouter, HTTPException
+from ..services.metrics import observe_external
 
 router = APIRouter(prefix="/lyzr-proxy", tags=["LYZR Proxy"])
 
 LYZR_SESSION_URL = os.getenv("LYZR_SESSION_URL", "https://agent-prod.studio.lyzr.ai/v1/sessions")
 LYZR_API_KEY = os.getenv("LYZR_API_KEY", "")
 
+# Session histories are cached briefly; once stale they are revalidated with
+# If-None-Match when the upstream sent an ETag
+LYZR_CACHE_TTL = float(os.getenv("LYZR_CACHE_TTL", "5"))
+LYZR_CACHE_SIZE = 1000
+LYZR_MAX_RETRIES = int(os.getenv("LYZR_MAX_RETRIES", "2"))
+LYZR_RETRY_BASE_DELAY = 0.2
+RETRYABLE_STATUS = {502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+_inflight: dict[str, asyncio.Task] = {}
+_cache: "OrderedDict[str, tuple[float, Optional[str], list]]" = OrderedDict()
+
+
+async def start_client():
+    """Open the shared keep-alive client (called on app startup)."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30, connect=5),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            headers={"accept": "application/json", "x-api-key": LYZR_API_KEY},
+        )
+
+
+async def close_client():
+    """Close the shared client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 @router.get("/sessions/{session_id}/history")
 async def get_session_history(session_id: str):
-    """Proxy the LYZR session history API to avoid CORS issues."""
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.get(
-                f"{LYZR_SESSION_URL}/{session_id}/history",
-                headers={
-                    "accept": "application/json",
-                    "x-api-key": LYZR_API_KEY,
-                },
-            )
-
-        if resp.status_code == 500:
-            # 500 with "No messages found" means empty session
-            return []
-
-        if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    """Proxy the LYZR session history API to avoid CORS issues.
 
-        data = resp.json()
-        return data if isinstance(data, list) else []
+    Concurrent requests for the same session share one upstream fetch.
+    """
+    task = _inflight.get(session_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_history(session_id))
+        _inflight[session_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(session_id, None))
+    # Shield so one disconnecting caller doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
+async def _fetch_history(session_id: str) -> list:
+    cached = _cache.get(session_id)
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        return cached[2]
+
+    headers = {}
+    if cached and cached[1]:
+        headers["If-None-Match"] = cached[1]
+
+    try:
+        resp = await _get_with_retries(f"{LYZR_SESSION_URL}/{session_id}/history", headers)
     except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=str(e))
+
+    etag = resp.headers.get("etag")
+    if resp.status_code == 304 and cached:
+        data = cached[2]
+        etag = etag or cached[1]
+    elif resp.status_code == 500:
+        # 500 with "No messages found" means empty session
+        data = []
+    elif resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    else:
+        data = resp.json()
+        data = data if isinstance(data, list) else []
+
+    _cache[session_id] = (time.monotonic() + LYZR_CACHE_TTL, etag, data)
+    _cache.move_to_end(session_id)
+    while len(_cache) > LYZR_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return data
+
+
+async def _get_with_retries(url: str, headers: dict) -> httpx.Response:
+    """GET with exponential backoff and full jitter on transport errors and 502/503/504."""
+    if _client is None:
+        await start_client()
+    for attempt in range(LYZR_MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            resp = await _client.get(url, headers=headers)
+            observe_external("lyzr", "get_session", time.perf_counter() - start, str(resp.status_code))
+            if resp.status_code not in RETRYABLE_STATUS or attempt == LYZR_MAX_RETRIES:
+                return resp
+        except httpx.TransportError:
+            observe_external("lyzr", "get_session", time.perf_counter() - start, "transport_error")
+            if attempt == LYZR_MAX_RETRIES:
+                raise
+        await asyncio.sleep(random.uniform(0, LYZR_RETRY_BASE_DELAY * 2 ** attempt))
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
+from typing import Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from ..database.connection import messages_collection
+from ..database.bulk import read_bulk_body, run_bulk
+from ..database.pagination import PageParams, paginate
+from ..database.writes import minimal_response, wants_minimal
+from ..database.serialization import doc_to_response
+from ..services.s3 import generate_presigned_urls, s3_key_from_attachment
 from ..models.message import (
     MessageCreate,
     MessageUpdate,
@@ -11,24 +18,28 @@ from ..models.message import (
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
 
-def doc_to_response(doc: dict) -> dict:
-    doc["id"] = str(doc.pop("_id"))
-    return doc
-
-
 # PUT - Create a new message
 @router.put("/", response_model=MessageResponse)
-async def create_message(data: MessageCreate):
-    result = await messages_collection.insert_one(data.model_dump())
-    created = await messages_collection.find_one({"_id": result.inserted_id})
-    return doc_to_response(created)
+async def create_message(data: MessageCreate, prefer: Optional[str] = Header(None)):
+    doc = data.model_dump()
+    await messages_collection.insert_one(doc)  # insert_one sets doc["_id"]
+    if wants_minimal(prefer):
+        return minimal_response(doc["_id"])
+    return doc_to_response(doc)
 
 
 # GET - Get all messages
 @router.get("/", response_model=list[MessageResponse])
-async def get_all_messages():
-    docs = await messages_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_messages(response: Response, page: PageParams = Depends()):
+    return await paginate(messages_collection, {}, page, response, doc_to_response, MessageResponse)
+
+
+# POST - Bulk create/upsert/update/delete messages (JSON array or NDJSON body)
+@router.post("/bulk")
+async def bulk_messages(request: Request):
+    """Apply many operations in chunked bulk_writes; returns a per-item report."""
+    ops = await read_bulk_body(request)
+    return await run_bulk(messages_collection, ops, MessageCreate, MessageUpdate)
 
 
 # GET - Get a single message by ID
@@ -44,22 +55,45 @@ async def get_message(message_id: str):
 
 # GET - Get all messages for a thread
 @router.get("/thread/{thread_id}", response_model=list[MessageResponse])
-async def get_messages_by_thread(thread_id: str):
-    docs = await messages_collection.find({"thread_id": thread_id}).to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_messages_by_thread(
+    thread_id: str,
+    response: Response,
+    page: PageParams = Depends(),
+    presign: bool = Query(False, description="Inline presigned URLs for attachments"),
+):
+    if presign and page.stream:
+        raise HTTPException(status_code=400, detail="presign is not supported with stream")
+    return await paginate(
+        messages_collection, {"thread_id": thread_id}, page, response, doc_to_response, MessageResponse,
+        enrich=attach_presigned_urls if presign else None,
+    )
+
+
+async def attach_presigned_urls(docs: list[dict]) -> None:
+    """Sign every attachment across the page in one batch and inline the URLs."""
+    keys = {a: s3_key_from_attachment(a) for d in docs for a in d.get("attachment", [])}
+    if not keys:
+        return
+    urls = await generate_presigned_urls(list(set(keys.values())))
+    for d in docs:
+        d["attachment_urls"] = {a: urls[keys[a]] for a in d.get("attachment", [])}
 
 
 # POST - Update (full replace) a message
 @router.post("/{message_id}", response_model=MessageResponse)
-async def update_message(message_id: str, data: MessageCreate):
+async def update_message(message_id: str, data: MessageCreate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(message_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = await messages_collection.replace_one(
-        {"_id": ObjectId(message_id)}, data.model_dump()
+    if wants_minimal(prefer):
+        result = await messages_collection.replace_one({"_id": ObjectId(message_id)}, data.model_dump())
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return minimal_response(message_id)
+    doc = await messages_collection.find_one_and_replace(
+        {"_id": ObjectId(message_id)}, data.model_dump(), return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Message not found")
-    doc = await messages_collection.find_one({"_id": ObjectId(message_id)})
     return doc_to_response(doc)
 
 
@@ -76,18 +110,22 @@ async def delete_message(message_id: str):
 
 # PATCH - Partially update a message
 @router.patch("/{message_id}", response_model=MessageResponse)
-async def patch_message(message_id: str, data: MessageUpdate):
+async def patch_message(message_id: str, data: MessageUpdate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(message_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await messages_collection.update_one(
-        {"_id": ObjectId(message_id)}, {"$set": update_data}
+    if wants_minimal(prefer):
+        result = await messages_collection.update_one({"_id": ObjectId(message_id)}, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return minimal_response(message_id)
+    doc = await messages_collection.find_one_and_update(
+        {"_id": ObjectId(message_id)}, {"$set": update_data}, return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Message not found")
-    doc = await messages_collection.find_one({"_id": ObjectId(message_id)})
     return doc_to_response(doc)
 
 
@@ -0,0 +1,51 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..services.realtime import hub, event_json
+
+router = APIRouter(prefix="/realtime", tags=["Realtime"])
+
+HEARTBEAT_SECONDS = 15
+
+
+# GET - Server-sent events for threads and/or vendors
+@router.get("/events")
+async def stream_events(
+    thread_id: list[str] = Query([]),
+    vendor_id: list[str] = Query([]),
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream `messages` and `email_threads` changes for the given thread_ids/vendor_ids.
+
+    EventSource resends the last event id on reconnect (Last-Event-ID header);
+    missed events are replayed, or a `reset` event is sent when they are too old.
+    """
+    if not thread_id and not vendor_id:
+        raise HTTPException(status_code=400, detail="thread_id or vendor_id is required")
+    if not hub.running:
+        raise HTTPException(status_code=503, detail="Realtime updates unavailable")
+
+    sub = hub.subscribe(thread_id, vendor_id, last_event_id_header or last_event_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not sub.exhausted:
+                event = await sub.get(HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                name = event["operation"]
+                if event["collection"]:
+                    name = f"{event['collection']}.{name}"
+                id_line = f"id: {event['id']}\n" if event["id"] else ""
+                yield f"{id_line}event: {name}\ndata: {event_json(event)}\n\n"
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
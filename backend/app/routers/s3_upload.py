@@ -1,20 +1,28 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
-from ..services.s3 import upload_file_to_s3, generate_presigned_url
+from pydantic import BaseModel
+from ..services.s3 import upload_stream_to_s3, generate_presigned_url, generate_presigned_urls, get_s3_metrics
+from ..services.uploads import hash_upload
 from ..database.connection import messages_collection
 
 router = APIRouter(prefix="/s3-upload", tags=["S3 Upload"])
 
 
+class PresignBatchRequest(BaseModel):
+    s3_keys: list[str]
+
+
 @router.post("/")
 async def upload_to_s3(
     file: UploadFile = File(...),
     document_type: str = Form("RFQ"),
     thread_id: str = Form(...),
+    content_addressed: bool = Form(False),
 ):
     """Upload an RFQ/RFP file to S3 and save a message record in MongoDB."""
     try:
-        file_bytes = await file.read()
-        result = upload_file_to_s3(file_bytes, file.filename, document_type)
+        # Hash and size-check in chunks, then stream the spooled file to S3
+        _, sha256 = await hash_upload(file)
+        result = await upload_stream_to_s3(file.file, file.filename, document_type, sha256, content_addressed)
         s3_key = result["s3_key"]
         presigned_url = result["url"]
 
@@ -34,6 +42,56 @@ async def upload_to_s3(
             "thread_id": thread_id,
             "document_type": document_type,
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/multi")
+async def upload_to_s3_for_threads(
+    file: UploadFile = File(...),
+    document_type: str = Form("RFQ"),
+    thread_ids: list[str] = Form(...),
+):
+    """Upload one file to S3 (content-addressed) and attach it to many threads.
+
+    The same document sent to N vendors is stored once; one message per
+    thread is created with a single insert_many.
+    """
+    try:
+        _, sha256 = await hash_upload(file)
+        result = await upload_stream_to_s3(file.file, file.filename, document_type, sha256, content_addressed=True)
+        s3_key = result["s3_key"]
+
+        thread_ids = list(dict.fromkeys(t for t in thread_ids if t))
+        message_docs = [
+            {
+                "message": f"{document_type} Document",
+                "attachment": [s3_key],
+                "thread_id": tid,
+                "sender": "customer",
+            }
+            for tid in thread_ids
+        ]
+        inserted_ids = []
+        if message_docs:
+            db_result = await messages_collection.insert_many(message_docs)
+            inserted_ids = db_result.inserted_ids
+
+        return {
+            "s3_url": result["url"],
+            "s3_key": s3_key,
+            "sha256": result["sha256"],
+            "deduplicated": result["deduplicated"],
+            "document_type": document_type,
+            "messages": [
+                {"thread_id": tid, "message_id": str(mid)}
+                for tid, mid in zip(thread_ids, inserted_ids)
+            ],
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -42,7 +100,23 @@ async def upload_to_s3(
 async def get_presigned_url(s3_key: str = Query(...)):
     """Generate a presigned URL for an existing S3 object (7-day expiry)."""
     try:
-        url = generate_presigned_url(s3_key)
+        url = await generate_presigned_url(s3_key)
         return {"url": url, "s3_key": s3_key}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/presign-batch")
+async def get_presigned_urls(data: PresignBatchRequest):
+    """Presign every attachment key in one call. Returns {"urls": {s3_key: url}}."""
+    try:
+        urls = await generate_presigned_urls(data.s3_keys)
+        return {"urls": urls}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics")
+async def get_storage_metrics():
+    """Per-operation S3 call counts, errors and latency for this worker."""
+    return get_s3_metrics()
@@ -0,0 +1,53 @@
+from typing import Literal
+from bson import ObjectId
+from fastapi import APIRouter, Query
+from ..database.connection import vendors_collection, internal_vendors_collection, contracts_collection
+from ..database.serialization import doc_to_response
+from ..services.search import SearchService
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+search_service = SearchService({
+    "vendors": vendors_collection,
+    "internal_vendors": internal_vendors_collection,
+    "contracts": contracts_collection,
+})
+
+SearchCollection = Literal["vendors", "internal_vendors", "contracts"]
+
+
+async def attach_documents(results: list[dict]):
+    """Set each result's `document` to its full record, one $in query per collection."""
+    ids_by_collection: dict[str, list] = {}
+    for result in results:
+        doc_id = result["id"]
+        ids_by_collection.setdefault(result["collection"], []).append(
+            ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+        )
+    documents = {}
+    for name, ids in ids_by_collection.items():
+        async for doc in search_service.collections[name].find({"_id": {"$in": ids}}):
+            doc = doc_to_response(doc)
+            documents[(name, doc["id"])] = doc
+    # A hit deleted since it was indexed gets None
+    for result in results:
+        result["document"] = documents.get((result["collection"], result["id"]))
+
+
+# GET - Ranked search across vendors, internal vendors and contracts
+@router.get("")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    collection: list[SearchCollection] = Query(list(search_service.collections)),
+    limit: int = Query(20, ge=1, le=100),
+    documents: bool = Query(False, description="Include each hit's full document"),
+):
+    """Match names, services, certifications, headquarters and categories.
+
+    All words must match; the last one is completed as a prefix unless the
+    query ends with a space. Results are ranked by field weight and rarity.
+    """
+    results = await search_service.search(q, dict.fromkeys(collection), limit)
+    if documents:
+        await attach_documents(results)
+    return {"query": q, "count": len(results), "results": results}
@@ -4,8 +4,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from pymongo.errors import DuplicateKeyError
-from ..database.connection import vendors_collection, email_threads_collection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..database.connection import client, vendors_collection, email_threads_collection, supports_transactions
+from ..services.cache import response_cache
 
 router = APIRouter(prefix="/send-document", tags=["Send Document"])
 
@@ -49,6 +51,55 @@ def generate_thread_id() -> str:
     return f"THREAD-{ts}-{short}"
 
 
+def _build_vendor_upserts(vendors: list[tuple[str, list[str], VendorPayload]], data: SendDocumentRequest) -> list[UpdateOne]:
+    """One upsert per distinct vendor_id: push every new thread, create the vendor if missing."""
+    ops = []
+    for vendor_id, thread_ids, v in vendors:
+        ops.append(UpdateOne(
+            {"vendor_id": vendor_id},
+            {
+                "$push": {"thread_ids": {"$each": thread_ids}},
+                "$setOnInsert": {
+                    "vendor_name": v.vendor_name,
+                    "quoted_price": data.quoted_price,
+                    "technical_compliance_status": False,
+                    "certifications_submitted": [],
+                    "esg_declaration": False,
+                    "exceptions_noted": "",
+                    "clarifications": [],
+                    "response_date": datetime.utcnow(),
+                    "vendor_type": v.vendor_type,
+                    "contact_email": v.contact_email,
+                    "contact_name": v.contact_name,
+                    "headquarters": v.headquarters,
+                    "website": v.website,
+                    "source": v.source,
+                },
+            },
+            upsert=True,
+        ))
+    return ops
+
+
+async def _write_fanout(thread_docs: list[dict], vendor_ops: list[UpdateOne], session=None) -> set[int]:
+    """Insert all threads and upsert all vendors; return indexes of vendor ops that created a vendor."""
+    await email_threads_collection.insert_many(thread_docs, session=session)
+    try:
+        result = await vendors_collection.bulk_write(vendor_ops, ordered=False, session=session)
+        return set(result.upserted_ids)
+    except BulkWriteError as e:
+        if session is not None:
+            raise
+        # Race: another request created some of these vendors between our upserts.
+        # Retrying the duplicate-key ops now matches the existing vendor and pushes.
+        details = e.details
+        dup_indexes = [err["index"] for err in details["writeErrors"] if err.get("code") == 11000]
+        if len(dup_indexes) != len(details["writeErrors"]):
+            raise
+        await vendors_collection.bulk_write([vendor_ops[i] for i in dup_indexes], ordered=False)
+        return {u["index"] for u in details.get("upserted", [])}
+
+
 @router.put("/", response_model=SendDocumentResponse)
 async def send_document(data: SendDocumentRequest):
     created = []
@@ -56,17 +107,16 @@ async def send_document(data: SendDocumentRequest):
 
     print(f"[send_document] Received {len(data.vendors)} vendors, doc_type={data.document_type}")
     try:
+        # 1. One thread per vendor entry (convert certification strings to objects)
+        now = datetime.utcnow()
+        assignments = []      # (vendor_id, vendor payload, thread_id) in request order
+        thread_docs = []
         for v in data.vendors:
-            print(f"[send_document] Processing vendor: {v.vendor_name} ({v.vendor_id})")
             # vendor_id = website URL (primary key for both internal & external)
-            vendor_id = v.vendor_id  # frontend already maps website → vendor_id
-
-            if not vendor_id:
-                vendor_id = v.website or v.contact_email or v.vendor_name or "unknown"
-
-            # 1. Create thread with certification data (convert strings to objects)
+            vendor_id = v.vendor_id or v.website or v.contact_email or v.vendor_name or "unknown"
             thread_id = generate_thread_id()
-            thread_doc = {
+            assignments.append((vendor_id, v, thread_id))
+            thread_docs.append({
                 "thread_id": thread_id,
                 "vendor_id": vendor_id,
                 "subject": data.subject,
@@ -74,63 +124,40 @@ async def send_document(data: SendDocumentRequest):
                 "mandatory": [{"certificate": c, "is_submitted": ""} for c in data.mandatory],
                 "good_to_have": [{"certificate": c, "is_submitted": ""} for c in data.good_to_have],
                 "summary": data.summary,
-                "created_at": datetime.utcnow(),
-            }
-            print(f"[send_document] Inserting thread {thread_id} for vendor {vendor_id}")
-            await email_threads_collection.insert_one(thread_doc)
-            print(f"[send_document] Thread inserted OK. Now upserting vendor...")
-
-            # 2. Upsert vendor: try update first, create if not found
-            result = await vendors_collection.update_one(
-                {"vendor_id": vendor_id},
-                {"$push": {"thread_ids": thread_id}},
-            )
-
-            if result.matched_count > 0:
-                updated.append(SendDocumentVendorResult(
-                    vendor_id=vendor_id,
-                    vendor_name=v.vendor_name,
-                    thread_id=thread_id,
-                ))
+                "created_at": now,
+            })
+
+        if not thread_docs:
+            return SendDocumentResponse(created_vendors=created, updated_vendors=updated)
+
+        # 2. Group by vendor_id so a vendor listed twice gets a single upsert
+        grouped = {}
+        for vendor_id, v, thread_id in assignments:
+            if vendor_id not in grouped:
+                grouped[vendor_id] = (vendor_id, [], v)
+            grouped[vendor_id][1].append(thread_id)
+        vendor_groups = list(grouped.values())
+        vendor_ops = _build_vendor_upserts(vendor_groups, data)
+
+        if await supports_transactions():
+            async with await client.start_session() as session:
+                upserted = await session.with_transaction(
+                    lambda s: _write_fanout(thread_docs, vendor_ops, session=s)
+                )
+        else:
+            upserted = await _write_fanout(thread_docs, vendor_ops)
+        await response_cache.invalidate("vendors")
+
+        # 3. A vendor created by this request counts as created for its first
+        #    thread only; any further threads for it count as updates
+        created_ids = {vendor_groups[i][0] for i in upserted}
+        for vendor_id, v, thread_id in assignments:
+            item = SendDocumentVendorResult(vendor_id=vendor_id, vendor_name=v.vendor_name, thread_id=thread_id)
+            if vendor_id in created_ids:
+                created.append(item)
+                created_ids.discard(vendor_id)
             else:
-                # Vendor doesn't exist - create it
-                vendor_doc = {
-                    "vendor_id": vendor_id,
-                    "vendor_name": v.vendor_name,
-                    "thread_ids": [thread_id],
-                    "quoted_price": data.quoted_price,
-                    "technical_compliance_status": False,
-                    "certifications_submitted": [],
-                    "esg_declaration": False,
-                    "exceptions_noted": "",
-                    "clarifications": [],
-                    "response_date": datetime.utcnow(),
-                    "vendor_type": v.vendor_type,
-                    "contact_email": v.contact_email,
-                    "contact_name": v.contact_name,
-                    "headquarters": v.headquarters,
-                    "website": v.website,
-                    "source": v.source,
-                }
-                try:
-                    await vendors_collection.insert_one(vendor_doc)
-                except DuplicateKeyError:
-                    # Race condition: vendor was created between check and insert
-                    await vendors_collection.update_one(
-                        {"vendor_id": vendor_id},
-                        {"$push": {"thread_ids": thread_id}},
-                    )
-                    updated.append(SendDocumentVendorResult(
-                        vendor_id=vendor_id,
-                        vendor_name=v.vendor_name,
-                        thread_id=thread_id,
-                    ))
-                    continue
-                created.append(SendDocumentVendorResult(
-                    vendor_id=vendor_id,
-                    vendor_name=v.vendor_name,
-                    thread_id=thread_id,
-                ))
+                updated.append(item)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {str(e)}")
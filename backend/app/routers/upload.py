@@ -2,6 +2,7 @@ import uuid
 import os
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
+from ..services.uploads import save_upload
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
@@ -16,15 +17,14 @@ async def upload_file(file: UploadFile = File(...)):
     saved_name = f"{uuid.uuid4().hex}{ext}"
     file_path = os.path.join(UPLOAD_DIR, saved_name)
 
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    size, sha256 = await save_upload(file, file_path)
 
     return {
         "filename": file.filename,
         "saved_name": saved_name,
         "url": f"/api/upload/files/{saved_name}",
-        "size": len(content),
+        "size": size,
+        "sha256": sha256,
     }
 
 
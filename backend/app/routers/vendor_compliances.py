@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
+from typing import Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from ..database.connection import vendor_compliances_collection
+from ..database.bulk import read_bulk_body, run_bulk
+from ..database.pagination import PageParams, paginate
+from ..database.writes import minimal_response, wants_minimal
+from ..database.serialization import doc_to_response
+from ..services.cache import response_cache
 from ..models.vendor_compliance import (
     VendorComplianceCreate,
     VendorComplianceUpdate,
@@ -11,24 +18,31 @@ from ..models.vendor_compliance import (
 router = APIRouter(prefix="/vendor-compliances", tags=["Vendor Compliances"])
 
 
-def doc_to_response(doc: dict) -> dict:
-    doc["id"] = str(doc.pop("_id"))
-    return doc
-
-
 # PUT - Create a new vendor compliance record
 @router.put("/", response_model=VendorComplianceResponse)
-async def create_vendor_compliance(data: VendorComplianceCreate):
-    result = await vendor_compliances_collection.insert_one(data.model_dump())
-    created = await vendor_compliances_collection.find_one({"_id": result.inserted_id})
-    return doc_to_response(created)
+async def create_vendor_compliance(data: VendorComplianceCreate, prefer: Optional[str] = Header(None)):
+    doc = data.model_dump()
+    await vendor_compliances_collection.insert_one(doc)  # insert_one sets doc["_id"]
+    await response_cache.invalidate("vendor_compliances")
+    if wants_minimal(prefer):
+        return minimal_response(doc["_id"])
+    return doc_to_response(doc)
 
 
 # GET - Get all vendor compliance records
 @router.get("/", response_model=list[VendorComplianceResponse])
-async def get_all_vendor_compliances():
-    docs = await vendor_compliances_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_vendor_compliances(response: Response, page: PageParams = Depends()):
+    return await paginate(vendor_compliances_collection, {}, page, response, doc_to_response, VendorComplianceResponse)
+
+
+# POST - Bulk create/upsert/update/delete vendor compliance records (JSON array or NDJSON body)
+@router.post("/bulk")
+async def bulk_vendor_compliances(request: Request):
+    """Apply many operations in chunked bulk_writes; returns a per-item report."""
+    ops = await read_bulk_body(request)
+    result = await run_bulk(vendor_compliances_collection, ops, VendorComplianceCreate, VendorComplianceUpdate)
+    await response_cache.invalidate("vendor_compliances")
+    return result
 
 
 # GET - Get a single vendor compliance by ID
@@ -44,15 +58,21 @@ async def get_vendor_compliance(compliance_id: str):
 
 # POST - Update (full replace) a vendor compliance record
 @router.post("/{compliance_id}", response_model=VendorComplianceResponse)
-async def update_vendor_compliance(compliance_id: str, data: VendorComplianceCreate):
+async def update_vendor_compliance(compliance_id: str, data: VendorComplianceCreate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(compliance_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = await vendor_compliances_collection.replace_one(
-        {"_id": ObjectId(compliance_id)}, data.model_dump()
+    if wants_minimal(prefer):
+        result = await vendor_compliances_collection.replace_one({"_id": ObjectId(compliance_id)}, data.model_dump())
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Vendor compliance not found")
+        await response_cache.invalidate("vendor_compliances")
+        return minimal_response(compliance_id)
+    doc = await vendor_compliances_collection.find_one_and_replace(
+        {"_id": ObjectId(compliance_id)}, data.model_dump(), return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Vendor compliance not found")
-    doc = await vendor_compliances_collection.find_one({"_id": ObjectId(compliance_id)})
+    await response_cache.invalidate("vendor_compliances")
     return doc_to_response(doc)
 
 
@@ -64,23 +84,30 @@ async def delete_vendor_compliance(compliance_id: str):
     result = await vendor_compliances_collection.delete_one({"_id": ObjectId(compliance_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Vendor compliance not found")
+    await response_cache.invalidate("vendor_compliances")
     return {"message": "Vendor compliance deleted successfully"}
 
 
 # PATCH - Partially update a vendor compliance record
 @router.patch("/{compliance_id}", response_model=VendorComplianceResponse)
-async def patch_vendor_compliance(compliance_id: str, data: VendorComplianceUpdate):
+async def patch_vendor_compliance(compliance_id: str, data: VendorComplianceUpdate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(compliance_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await vendor_compliances_collection.update_one(
-        {"_id": ObjectId(compliance_id)}, {"$set": update_data}
+    if wants_minimal(prefer):
+        result = await vendor_compliances_collection.update_one({"_id": ObjectId(compliance_id)}, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Vendor compliance not found")
+        await response_cache.invalidate("vendor_compliances")
+        return minimal_response(compliance_id)
+    doc = await vendor_compliances_collection.find_one_and_update(
+        {"_id": ObjectId(compliance_id)}, {"$set": update_data}, return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Vendor compliance not found")
-    doc = await vendor_compliances_collection.find_one({"_id": ObjectId(compliance_id)})
+    await response_cache.invalidate("vendor_compliances")
     return doc_to_response(doc)
 
 
@@ -1,8 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 from bson import ObjectId
+from pymongo import ReturnDocument
 from typing import Optional, Dict, Any
-from ..database.connection import vendors_collection
+from ..database.connection import (
+    vendors_collection,
+    email_threads_collection,
+    messages_collection,
+    vendor_compliances_collection,
+)
+from ..database.bulk import read_bulk_body, run_bulk
+from ..database.pagination import PageParams, paginate
+from ..database.writes import minimal_response, wants_minimal
+from ..database.vendor_lookup import VENDOR_ID_PATHS, find_by_vendor_id, vendor_ids_response
+from ..database.serialization import doc_to_response
+from ..services.cache import response_cache
+from .messages import attach_presigned_urls
 from ..models.vendor import (
     VendorCreate,
     VendorUpdate,
@@ -12,24 +25,35 @@ from ..models.vendor import (
 router = APIRouter(prefix="/vendors", tags=["Vendors"])
 
 
-def doc_to_response(doc: dict) -> dict:
-    doc["id"] = str(doc.pop("_id"))
-    return doc
-
-
 # PUT - Create a new vendor
 @router.put("/", response_model=VendorResponse)
-async def create_vendor(data: VendorCreate):
-    result = await vendors_collection.insert_one(data.model_dump())
-    created = await vendors_collection.find_one({"_id": result.inserted_id})
-    return doc_to_response(created)
+async def create_vendor(data: VendorCreate, prefer: Optional[str] = Header(None)):
+    doc = data.model_dump()
+    await vendors_collection.insert_one(doc)  # insert_one sets doc["_id"]
+    await response_cache.invalidate("vendors")
+    if wants_minimal(prefer):
+        return minimal_response(doc["_id"])
+    return doc_to_response(doc)
 
 
 # GET - Get all vendors
 @router.get("/", response_model=list[VendorResponse])
-async def get_all_vendors():
-    docs = await vendors_collection.find().to_list(1000)
-    return [doc_to_response(d) for d in docs]
+async def get_all_vendors(request: Request, response: Response, page: PageParams = Depends()):
+    return await response_cache.serve(
+        request, response, "vendors",
+        lambda: paginate(vendors_collection, {}, page, response, doc_to_response, VendorResponse),
+        VendorResponse,
+    )
+
+
+# POST - Bulk create/upsert/update/delete vendors (JSON array or NDJSON body)
+@router.post("/bulk")
+async def bulk_vendors(request: Request):
+    """Apply many operations in chunked bulk_writes; returns a per-item report. Upserts without an id match on vendor_id."""
+    ops = await read_bulk_body(request)
+    result = await run_bulk(vendors_collection, ops, VendorCreate, VendorUpdate, natural_key="vendor_id")
+    await response_cache.invalidate("vendors")
+    return result
 
 
 # GET - Get a single vendor by MongoDB _id
@@ -46,29 +70,15 @@ async def get_vendor(vendor_id: str):
 # GET - Get all vendor IDs for debugging
 @router.get("/search/all-ids")
 async def get_all_vendor_ids():
-    """Get all available vendor IDs in the collection for debugging"""
-    docs = await vendors_collection.find().to_list(1000)
-    vendor_ids = []
-    for doc in docs:
-        # Check for vendor_id at top level
-        if "vendor_id" in doc:
-            vendor_ids.append(doc["vendor_id"])
-        # Check for vendor_id in nested vendor_profile
-        elif "vendor_profile" in doc and "vendor_id" in doc["vendor_profile"]:
-            vendor_ids.append(doc["vendor_profile"]["vendor_id"])
-    return {"total": len(vendor_ids), "vendor_ids": vendor_ids}
+    """Every vendor_id in the collection, streamed from the vendor_id indexes (no row cap)"""
+    return vendor_ids_response(vendors_collection)
 
 
 # GET - Get vendor by vendor_id field (flexible search for nested or top-level)
 @router.get("/by-vendor-id/{vid}")
 async def get_vendor_by_vendor_id(vid: str):
-    # Try to find vendor with vendor_id at top level
-    doc = await vendors_collection.find_one({"vendor_id": vid})
-    
-    # If not found, try to find in vendor_profile nested field
-    if not doc:
-        doc = await vendors_collection.find_one({"vendor_profile.vendor_id": vid})
-    
+    doc = await find_by_vendor_id(vendors_collection, vid)
+
     if not doc:
         # Return a placeholder response instead of 404, so vendor panel shows something
         return {
@@ -90,34 +100,150 @@ async def get_vendor_by_vendor_id(vid: str):
     return doc_to_response(doc)
 
 
+def _projection_stage(fields: Optional[str], keep: tuple[str, ...] = ()) -> list[dict]:
+    """$project stage for a comma-separated field list (none when fields is empty)."""
+    if not fields:
+        return []
+    names = {f.strip() for f in fields.split(",") if f.strip()} | set(keep)
+    return [{"$project": {name: 1 for name in names}}]
+
+
+def build_vendor_full_pipeline(
+    vid: str,
+    thread_limit: int,
+    message_limit: int,
+    compliance_limit: int,
+    thread_fields: Optional[str] = None,
+    message_fields: Optional[str] = None,
+    compliance_fields: Optional[str] = None,
+    include_messages: bool = True,
+) -> list[dict]:
+    """Vendor + its newest threads (each with its messages) + compliance records.
+
+    Joins use localField/foreignField so each $lookup hits the vendor_id /
+    thread_id indexes on the joined collection. Without include_messages the
+    threads come back bare, for callers that load one thread's messages on demand.
+    """
+    thread_pipeline = [{"$sort": {"_id": -1}}, {"$limit": thread_limit}]
+    if include_messages:
+        message_pipeline = [{"$sort": {"_id": 1}}, {"$limit": message_limit}]
+        message_pipeline += _projection_stage(message_fields)
+        thread_pipeline.append({"$lookup": {
+            "from": messages_collection.name,
+            "localField": "thread_id",
+            "foreignField": "thread_id",
+            "pipeline": message_pipeline,
+            "as": "messages",
+        }})
+        thread_pipeline += _projection_stage(thread_fields, keep=("thread_id", "messages"))
+    else:
+        thread_pipeline += _projection_stage(thread_fields, keep=("thread_id",))
+
+    compliance_pipeline = [{"$sort": {"_id": -1}}, {"$limit": compliance_limit}]
+    compliance_pipeline += _projection_stage(compliance_fields)
+
+    return [
+        {"$match": {"$or": [{path: vid} for path in VENDOR_ID_PATHS]}},
+        # A top-level vendor_id match wins over a nested one
+        {"$addFields": {"_top_level": {"$eq": ["$vendor_id", vid]}}},
+        {"$sort": {"_top_level": -1}},
+        {"$limit": 1},
+        {"$addFields": {"_join_vendor_id": {"$ifNull": ["$vendor_id", "$vendor_profile.vendor_id"]}}},
+        {"$lookup": {
+            "from": email_threads_collection.name,
+            "localField": "_join_vendor_id",
+            "foreignField": "vendor_id",
+            "pipeline": thread_pipeline,
+            "as": "threads",
+        }},
+        {"$lookup": {
+            "from": vendor_compliances_collection.name,
+            "localField": "_join_vendor_id",
+            "foreignField": "vendor_id",
+            "pipeline": compliance_pipeline,
+            "as": "compliances",
+        }},
+        {"$project": {"_top_level": 0, "_join_vendor_id": 0}},
+    ]
+
+
+def _ids_to_str(doc: dict) -> dict:
+    doc = doc_to_response(doc) if "_id" in doc else doc
+    for key, value in doc.items():
+        if isinstance(value, list):
+            doc[key] = [_ids_to_str(v) if isinstance(v, dict) else v for v in value]
+    return doc
+
+
+# GET - Vendor with threads, messages and compliance records in one aggregation
+@router.get("/{vid:path}/full")
+async def get_vendor_full(
+    vid: str,
+    thread_limit: int = Query(50, ge=1, le=500),
+    message_limit: int = Query(100, ge=1, le=1000),
+    compliance_limit: int = Query(50, ge=1, le=500),
+    thread_fields: Optional[str] = None,
+    message_fields: Optional[str] = None,
+    compliance_fields: Optional[str] = None,
+    messages: bool = Query(True, description="Join each thread's messages"),
+    presign: bool = Query(False, description="Inline presigned URLs for message attachments"),
+):
+    """Everything the vendor panel needs, keyed by vendor_id (top-level or vendor_profile)."""
+    pipeline = build_vendor_full_pipeline(
+        vid, thread_limit, message_limit, compliance_limit,
+        thread_fields, message_fields, compliance_fields, include_messages=messages,
+    )
+    docs = await vendors_collection.aggregate(pipeline).to_list(1)
+    if not docs:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    doc = _ids_to_str(docs[0])
+    threads = doc.pop("threads", [])
+    compliances = doc.pop("compliances", [])
+    if presign:
+        await attach_presigned_urls([m for t in threads for m in t.get("messages", [])])
+    return {"vendor": doc, "threads": threads, "compliances": compliances}
+
+
 # POST - Update (full replace) a vendor
 @router.post("/{vendor_id}", response_model=VendorResponse)
-async def update_vendor(vendor_id: str, data: VendorCreate):
+async def update_vendor(vendor_id: str, data: VendorCreate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(vendor_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
-    result = await vendors_collection.replace_one(
-        {"_id": ObjectId(vendor_id)}, data.model_dump()
+    if wants_minimal(prefer):
+        result = await vendors_collection.replace_one({"_id": ObjectId(vendor_id)}, data.model_dump())
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        await response_cache.invalidate("vendors")
+        return minimal_response(vendor_id)
+    doc = await vendors_collection.find_one_and_replace(
+        {"_id": ObjectId(vendor_id)}, data.model_dump(), return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Vendor not found")
-    doc = await vendors_collection.find_one({"_id": ObjectId(vendor_id)})
+    await response_cache.invalidate("vendors")
     return doc_to_response(doc)
 
 
 # PATCH - Partially update a vendor
 @router.patch("/{vendor_id}", response_model=VendorResponse)
-async def patch_vendor(vendor_id: str, data: VendorUpdate):
+async def patch_vendor(vendor_id: str, data: VendorUpdate, prefer: Optional[str] = Header(None)):
     if not ObjectId.is_valid(vendor_id):
         raise HTTPException(status_code=400, detail="Invalid ID format")
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await vendors_collection.update_one(
-        {"_id": ObjectId(vendor_id)}, {"$set": update_data}
+    if wants_minimal(prefer):
+        result = await vendors_collection.update_one({"_id": ObjectId(vendor_id)}, {"$set": update_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        await response_cache.invalidate("vendors")
+        return minimal_response(vendor_id)
+    doc = await vendors_collection.find_one_and_update(
+        {"_id": ObjectId(vendor_id)}, {"$set": update_data}, return_document=ReturnDocument.AFTER
     )
-    if result.matched_count == 0:
+    if not doc:
         raise HTTPException(status_code=404, detail="Vendor not found")
-    doc = await vendors_collection.find_one({"_id": ObjectId(vendor_id)})
+    await response_cache.invalidate("vendors")
     return doc_to_response(doc)
 
 
@@ -129,6 +255,7 @@ async def delete_vendor(vendor_id: str):
     result = await vendors_collection.delete_one({"_id": ObjectId(vendor_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Vendor not found")
+    await response_cache.invalidate("vendors")
     return {"message": "Vendor deleted successfully"}
 
 
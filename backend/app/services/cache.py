@@ -0,0 +1,227 @@
+"""Response cache for read-heavy list endpoints.
+
+Entries are keyed by namespace generation + path + query string. Write handlers
+call `invalidate(namespace)`, which bumps the generation: every cached page of
+that namespace is orphaned at once, and a read that raced the write stores its
+result under the old generation where it is never served.
+
+The in-process LRU backend is per worker, and so are its generations: with
+several workers and no Redis, a write only invalidates the worker that handled
+it, and the others keep serving the old list for up to RESPONSE_CACHE_TTL.
+Run multi-worker deployments with REDIS_URL, which shares entries and
+generations across workers, or lower RESPONSE_CACHE_TTL to bound the staleness.
+Any client with the redis.asyncio get/set/incr/ping interface works, so tests
+can pass a fake.
+
+Backend errors (e.g. Redis down) never fail a request: reads fall through to
+the uncached handler (X-Cache: BYPASS) and failed invalidations are logged.
+"""
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from ..database.serialization import dumps
+from .profiling import timed_segment
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+# Response headers stored with the body and replayed on hits
+CACHED_HEADERS = ("x-next-cursor",)
+
+
+class MemoryCacheBackend:
+    """LRU with per-entry expiry; generations live in a plain dict."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        # Orphaned entries would only age out; drop them now to free the slots
+        prefix = f"{namespace}:"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCacheBackend:
+    """Shared backend over a redis.asyncio-compatible client."""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "respcache"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    async def from_url(cls, url: str) -> "RedisCacheBackend":
+        """Connect and ping, so a bad REDIS_URL fails at startup rather than on the first request."""
+        import redis.asyncio as redis  # optional dependency, only needed with REDIS_URL
+
+        backend = cls(redis.from_url(url))
+        await backend.client.ping()
+        return backend
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(f"{self.prefix}:{key}", value, ex=ttl)
+
+    async def generation(self, namespace: str) -> int:
+        value = await self.client.get(f"{self.prefix}:gen:{namespace}")
+        return int(value) if value else 0
+
+    async def bump(self, namespace: str):
+        await self.client.incr(f"{self.prefix}:gen:{namespace}")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl: int = RESPONSE_CACHE_TTL):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self._adapters: dict[type, TypeAdapter] = {}
+        self._metrics: dict[str, dict] = {}
+
+    def use_backend(self, backend):
+        self.backend = backend
+
+    async def invalidate(self, namespace: str):
+        """Drop every cached response of `namespace` (call after a successful write)."""
+        try:
+            await self.backend.bump(namespace)
+        except Exception as e:
+            # The write already succeeded; cached pages expire after the TTL
+            self._backend_error(namespace, "invalidate", e)
+            return
+        self._count(namespace, "invalidations")
+
+    def get_metrics(self) -> dict:
+        """Per-namespace hits, misses, 304s, invalidations and backend errors for this worker."""
+        return {"backend": self.backend.name, "namespaces": {ns: dict(m) for ns, m in self._metrics.items()}}
+
+    async def serve(
+        self,
+        request: Request,
+        response: Response,
+        namespace: str,
+        produce: Callable[[], Awaitable],
+        model: Optional[type[BaseModel]] = None,
+        ttl: Optional[int] = None,
+    ) -> Response:
+        """Return the cached body for this request, or run `produce` and cache its result.
+
+        `produce` returns what the endpoint would have returned: a list of
+        dicts (serialized through list[model] when given, like response_model)
+        or a Response. Streaming responses bypass the cache. `ttl` overrides
+        the cache-wide expiry for this entry.
+        """
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        try:
+            generation = await self.backend.generation(namespace)
+            key = f"{namespace}:{generation}:{request.url.path}?{query}"
+            cached = await self.backend.get(key)
+        except Exception as e:
+            self._backend_error(namespace, "read", e)
+            key = cached = None
+
+        if cached is not None:
+            self._count(namespace, "hits")
+            meta, body = cached.split(b"\n", 1)
+            meta = json.loads(meta)
+            etag, headers = meta["etag"], meta["headers"]
+            status = "HIT"
+        else:
+            self._count(namespace, "misses")
+            result = await produce()
+            if isinstance(result, StreamingResponse):
+                return result
+            if isinstance(result, Response):
+                body = result.body
+                source_headers = result.headers
+            else:
+                body = self._serialize(result, model)
+                source_headers = response.headers
+            headers = {h: source_headers[h] for h in CACHED_HEADERS if h in source_headers}
+            etag = _etag(body)
+            meta = json.dumps({"etag": etag, "headers": headers}).encode()
+            status = "MISS"
+            if key is None:
+                status = "BYPASS"
+            else:
+                try:
+                    await self.backend.set(key, meta + b"\n" + body, ttl or self.ttl)
+                except Exception as e:
+                    self._backend_error(namespace, "write", e)
+
+        headers = {**headers, "ETag": etag, "Cache-Control": "private, no-cache", "X-Cache": status}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self._count(namespace, "not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _serialize(self, result, model: Optional[type[BaseModel]]) -> bytes:
+        if model is None:
+            with timed_segment("serialization"):
+                return dumps(result)
+        adapter = self._adapters.get(model)
+        if adapter is None:
+            adapter = self._adapters[model] = TypeAdapter(list[model])
+        with timed_segment("validation"):
+            items = adapter.validate_python(result)
+        with timed_segment("serialization"):
+            return adapter.dump_json(items)
+
+    def _count(self, namespace: str, field: str):
+        m = self._metrics.setdefault(
+            namespace, {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0, "errors": 0}
+        )
+        m[field] += 1
+
+    def _backend_error(self, namespace: str, operation: str, error: Exception):
+        self._count(namespace, "errors")
+        print(f"Response cache {operation} failed for {namespace} ({self.backend.name}): {error}")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,313 @@
+"""Process metrics in the Prometheus text exposition format (served on GET /metrics).
+
+A small registry of counters, gauges and histograms feeds three sources:
+
+- MetricsMiddleware: per-route request latency, in-flight requests, response
+  sizes and status codes. Routes are labelled by their path template
+  (/api/vendors/{vendor_id}), never the raw path, to keep label sets bounded.
+- CommandMetrics: a pymongo command listener timing every MongoDB command per
+  collection and counting the documents it returned.
+- PoolMetrics: a pymongo pool listener tracking open and checked-out
+  connections per server, checkout waits and checkout failures.
+- observe_external(): outbound calls (S3, LYZR).
+
+Metrics are per worker process; Prometheus aggregates across scrapes of each worker.
+"""
+import time
+import threading
+from bisect import bisect_left
+from typing import Iterable, Optional
+from pymongo import monitoring
+from .profiling import record
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (non-cumulative, last is +Inf), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode()
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body byte is sent.", ("method", "route")))
+http_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served.", ("method",)))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body sizes.", ("method", "route"), buckets=SIZE_BUCKETS))
+
+mongo_commands = registry.register(Counter(
+    "mongodb_commands_total", "MongoDB commands by collection, command and outcome.", ("collection", "command", "outcome")))
+mongo_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time.", ("collection", "command")))
+mongo_documents = registry.register(Counter(
+    "mongodb_documents_returned_total", "Documents returned in find/aggregate/getMore batches.", ("collection", "command")))
+
+mongo_pool_size = registry.register(Gauge(
+    "mongodb_pool_connections", "Open connections per server.", ("address",)))
+mongo_pool_checked_out = registry.register(Gauge(
+    "mongodb_pool_checked_out", "Connections currently checked out per server.", ("address",)))
+mongo_pool_max = registry.register(Gauge(
+    "mongodb_pool_max_size", "Configured maxPoolSize (per server).", ()))
+mongo_pool_wait = registry.register(Histogram(
+    "mongodb_pool_checkout_seconds", "Time to check out a connection, including waits for a free one.", ("address",)))
+mongo_pool_failures = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Failed checkouts (timeout, pool closed, connection error).", ("address", "reason")))
+
+external_requests = registry.register(Counter(
+    "external_requests_total", "Outbound calls by service, operation and outcome.", ("service", "operation", "outcome")))
+external_latency = registry.register(Histogram(
+    "external_request_duration_seconds", "Outbound call latency.", ("service", "operation")))
+
+
+def observe_external(service: str, operation: str, seconds: float, outcome: str = "ok"):
+    external_requests.inc(service, operation, outcome)
+    external_latency.observe(seconds, service, operation)
+    record("external", seconds)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_progress.dec(method)
+            route = _route_label(scope)
+            http_requests.inc(method, route, str(status))
+            http_latency.observe(time.perf_counter() - start, method, route)
+            http_response_size.observe(size, method, route)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times MongoDB commands per collection (pass to the client's event_listeners)."""
+
+    # Commands whose reply carries a cursor batch
+    CURSOR_COMMANDS = {"find": "firstBatch", "aggregate": "firstBatch", "getMore": "nextBatch"}
+
+    def __init__(self):
+        self._pending: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        command = event.command
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        else:
+            collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.database_name if collection is None else "-"
+        with self._lock:
+            self._pending[self._key(event)] = collection
+
+    def _finish(self, event, outcome: str) -> Optional[str]:
+        with self._lock:
+            collection = self._pending.pop(self._key(event), "-")
+        mongo_commands.inc(collection, event.command_name, outcome)
+        seconds = event.duration_micros / 1e6
+        mongo_latency.observe(seconds, collection, event.command_name)
+        record("db", seconds)
+        return collection
+
+    def succeeded(self, event):
+        collection = self._finish(event, "ok")
+        batch = self.CURSOR_COMMANDS.get(event.command_name)
+        if batch:
+            docs = (event.reply.get("cursor") or {}).get(batch)
+            if docs:
+                mongo_documents.inc(collection, event.command_name, amount=len(docs))
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+command_metrics = CommandMetrics()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool usage per server (pass to the client's event_listeners)."""
+
+    def configure(self, max_pool_size: int):
+        mongo_pool_max.set(max_pool_size)
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def connection_created(self, event):
+        mongo_pool_size.inc(self._address(event))
+
+    def connection_closed(self, event):
+        mongo_pool_size.dec(self._address(event))
+
+    def connection_checked_out(self, event):
+        address = self._address(event)
+        mongo_pool_checked_out.inc(address)
+        if event.duration is not None:
+            mongo_pool_wait.observe(event.duration, address)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(self._address(event))
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_failures.inc(self._address(event), event.reason)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,166 @@
+"""Opt-in per-request profiling.
+
+Off unless PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set; when both are unset
+the middleware is not installed and the hooks below are no-ops (one ContextVar
+lookup), so normal requests pay nothing.
+
+A request is profiled when it sends `X-Profile: <PROFILE_TOKEN>` or is picked
+by PROFILE_SAMPLE_RATE (0-1). A profiled request gets:
+
+- a Server-Timing header with time spent in db (MongoDB commands), validation
+  (pydantic), serialization (document conversion and JSON encoding) and
+  external (S3, LYZR) segments, plus the total. Segments are summed across
+  concurrent work, so db can exceed total when queries run under
+  asyncio.gather. validation and serialization are timed where this app does
+  the work: paginated lists, the response cache and FastJSONResponse. Routes
+  that leave it to FastAPI's response_model report it under total only.
+  Streamed responses (NDJSON lists) get no Server-Timing: the header goes out
+  with the first chunk, before most of the work.
+- a sampled stack profile of the event-loop thread, written as folded stacks
+  (flamegraph.pl / speedscope input) to PROFILE_DIR, named in X-Profile-Id
+  (nothing is written if the request finished before the first sample).
+  Only one request is sampled at a time; the samples include anything else
+  the loop ran meanwhile.
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_HEADER = b"x-profile"
+
+SEGMENTS = ("db", "validation", "serialization", "external")
+
+_timings: ContextVar[Optional[dict]] = ContextVar("profile_timings", default=None)
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def record(segment: str, seconds: float):
+    """Add `seconds` to `segment` of the request being profiled, if any."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[segment] += seconds
+
+
+@contextmanager
+def timed_segment(segment: str):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[segment] += time.perf_counter() - start
+
+
+def server_timing(timings: dict, total: float) -> str:
+    parts = [f"{name};dur={timings[name] * 1000:.2f}" for name in SEGMENTS]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+
+def write_folded(path: str, counts: Counter):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        for stack, n in counts.most_common():
+            f.write(f"{stack} {n}\n")
+
+
+_sampler_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def _selected(self, scope) -> bool:
+        if PROFILE_TOKEN:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return value.decode("latin-1") == PROFILE_TOKEN
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timings = dict.fromkeys(SEGMENTS, 0.0)
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        sampler = None
+        if _sampler_lock.acquire(blocking=False):
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}" if sampler else None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                # No content-length: a streamed body, whose timings aren't known yet
+                if any(name == b"content-length" for name, _ in headers):
+                    headers.append((b"server-timing", server_timing(timings, time.perf_counter() - start).encode()))
+                if profile_id:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            if sampler is not None:
+                counts = sampler.stop()
+                _sampler_lock.release()
+                if counts:
+                    path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+                    try:
+                        await asyncio.to_thread(write_folded, path, counts)
+                    except OSError as e:
+                        print(f"Writing profile {path} failed: {e}")
@@ -0,0 +1,261 @@
+"""Push channel for thread updates.
+
+A single change-stream consumer reads inserts/updates on `messages` and
+`email_threads` and fans each event out, in memory, to the subscribers of its
+thread_id and vendor_id. Idle viewers cost nothing on the database side.
+
+Event ids are change-stream resume tokens. The hub keeps the most recent
+events so a reconnecting client can pass its last id and receive what it
+missed; the consumer itself resumes from its last token after stream errors.
+
+The source is swappable: LocalEventSource publishes events in-process (tests,
+standalone MongoDB without change streams).
+"""
+import os
+import base64
+import asyncio
+import itertools
+from collections import defaultdict, deque
+from typing import AsyncIterator, Iterable, Optional
+import bson
+from bson.errors import BSONError
+from ..database.serialization import doc_to_response, dumps
+
+WATCHED_COLLECTIONS = ("messages", "email_threads")
+WATCHED_OPERATIONS = ("insert", "update", "replace")
+
+# Recent events kept for replay on reconnect
+REALTIME_REPLAY_SIZE = int(os.getenv("REALTIME_REPLAY_SIZE", "5000"))
+# Events queued per subscriber before it is dropped (it then reconnects and replays)
+SUBSCRIBER_QUEUE_SIZE = 256
+RESTART_DELAY = 1.0
+THREAD_VENDOR_CACHE_SIZE = 10000
+
+
+def encode_resume_token(token: dict) -> str:
+    return base64.urlsafe_b64encode(bson.encode(token)).decode()
+
+
+def decode_resume_token(event_id: str) -> Optional[dict]:
+    try:
+        return bson.decode(base64.urlsafe_b64decode(event_id.encode()))
+    except (ValueError, BSONError):
+        return None
+
+
+def make_event(
+    event_id: str, collection: str, operation: str, document: Optional[dict], vendor_id: Optional[str] = None
+) -> dict:
+    doc = doc_to_response(dict(document or {})) or {}
+    return {
+        "id": event_id,
+        "collection": collection,
+        "operation": operation,
+        "thread_id": doc.get("thread_id") or None,
+        "vendor_id": doc.get("vendor_id") or vendor_id,
+        "document": doc,
+    }
+
+
+def event_json(event: dict) -> str:
+    """Event payload as sent to clients."""
+    return dumps({k: event[k] for k in ("collection", "operation", "thread_id", "vendor_id", "document")}).decode()
+
+
+class MongoChangeStreamSource:
+    """Database-level change stream filtered to the watched collections."""
+
+    def __init__(self, db):
+        self.db = db
+        self._thread_vendors: dict[str, str] = {}
+
+    async def events(self, resume_after: Optional[str] = None) -> AsyncIterator[dict]:
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+            "operationType": {"$in": list(WATCHED_OPERATIONS)},
+        }}]
+        token = decode_resume_token(resume_after) if resume_after else None
+        async with self.db.watch(pipeline, full_document="updateLookup", resume_after=token) as stream:
+            async for change in stream:
+                document = change.get("fullDocument")
+                if document is None:
+                    # Updated then deleted before the lookup ran
+                    continue
+                collection = change["ns"]["coll"]
+                vendor_id = None
+                if collection == "messages":
+                    vendor_id = await self._vendor_for_thread(document.get("thread_id"))
+                elif collection == "email_threads":
+                    self._remember_thread(document.get("thread_id"), document.get("vendor_id"))
+                yield make_event(
+                    encode_resume_token(change["_id"]), collection, change["operationType"], document, vendor_id
+                )
+
+    async def _vendor_for_thread(self, thread_id: Optional[str]) -> Optional[str]:
+        """Messages carry only thread_id; vendor routing needs the owning thread.
+
+        Misses are not cached: a message can be seen before its thread's insert,
+        and the thread is looked up again on the next message.
+        """
+        if not thread_id:
+            return None
+        if thread_id not in self._thread_vendors:
+            thread = await self.db["email_threads"].find_one({"thread_id": thread_id}, {"vendor_id": 1})
+            self._remember_thread(thread_id, thread.get("vendor_id") if thread else None)
+        return self._thread_vendors.get(thread_id)
+
+    def _remember_thread(self, thread_id: Optional[str], vendor_id: Optional[str]):
+        if not thread_id or not vendor_id:
+            return
+        if len(self._thread_vendors) >= THREAD_VENDOR_CACHE_SIZE:
+            self._thread_vendors.clear()
+        self._thread_vendors[thread_id] = vendor_id
+
+
+class LocalEventSource:
+    """In-process event source; call publish() where a change stream would fire."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._ids = itertools.count(1)
+
+    def publish(
+        self, collection: str, operation: str, document: dict, vendor_id: Optional[str] = None
+    ) -> dict:
+        event = make_event(str(next(self._ids)), collection, operation, document, vendor_id)
+        self._queue.put_nowait(event)
+        return event
+
+    def close(self):
+        self._queue.put_nowait(None)
+
+    async def events(self, resume_after: Optional[str] = None) -> AsyncIterator[dict]:
+        while True:
+            event = await self._queue.get()
+            if event is None:
+                return
+            yield event
+
+
+class Subscription:
+    def __init__(self, hub: "ChangeHub", thread_ids: set[str], vendor_ids: set[str]):
+        self.hub = hub
+        self.thread_ids = thread_ids
+        self.vendor_ids = vendor_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    @property
+    def keys(self) -> list[tuple[str, str]]:
+        return [("thread", t) for t in self.thread_ids] + [("vendor", v) for v in self.vendor_ids]
+
+    def matches(self, event: dict) -> bool:
+        return event.get("thread_id") in self.thread_ids or event.get("vendor_id") in self.vendor_ids
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: stop routing to it; the client resumes from its last id
+            self.overflowed = True
+            self.hub.unsubscribe(self)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.overflowed and self.queue.empty()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """Runs the shared consumer and routes its events to subscribers."""
+
+    def __init__(self, replay_size: int = REALTIME_REPLAY_SIZE):
+        self._subscribers: dict[tuple[str, str], set[Subscription]] = defaultdict(set)
+        self._recent: deque = deque(maxlen=replay_size)
+        self._task: Optional[asyncio.Task] = None
+        self.source = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, source):
+        await self.stop()
+        self.source = source
+        self._recent.clear()
+        self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(
+        self, thread_ids: Iterable[str] = (), vendor_ids: Iterable[str] = (), last_event_id: Optional[str] = None
+    ) -> Subscription:
+        """Register a subscriber. With last_event_id, buffered events after it are
+        queued first; if that id is no longer buffered a `reset` event tells the
+        client to refetch."""
+        sub = Subscription(self, set(thread_ids), set(vendor_ids))
+        if last_event_id:
+            ids = [e["id"] for e in self._recent]
+            if last_event_id in ids:
+                missed = itertools.islice(self._recent, ids.index(last_event_id) + 1, None)
+                for event in missed:
+                    if sub.matches(event):
+                        sub.offer(event)
+            else:
+                sub.offer({"id": None, "collection": None, "operation": "reset",
+                           "thread_id": None, "vendor_id": None, "document": None})
+        if not sub.overflowed:
+            for key in sub.keys:
+                self._subscribers[key].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        for key in sub.keys:
+            subs = self._subscribers.get(key)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def dispatch(self, event: dict):
+        self._recent.append(event)
+        targets = set(self._subscribers.get(("thread", event.get("thread_id")), ()))
+        targets.update(self._subscribers.get(("vendor", event.get("vendor_id")), ()))
+        for sub in targets:
+            sub.offer(event)
+
+    async def _consume(self):
+        last_id = None
+        while True:
+            try:
+                async for event in self.source.events(last_id):
+                    last_id = event["id"]
+                    self.dispatch(event)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Change stream consumer failed, resuming: {e}")
+                await asyncio.sleep(RESTART_DELAY)
+
+
+hub = ChangeHub()
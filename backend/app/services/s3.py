@@ -1,47 +1,295 @@
+import io
 import os
 import uuid
+import time
+import asyncio
+import hashlib
+import contextvars
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import boto3
-from dotenv import load_dotenv
+from functools import partial
+from typing import BinaryIO, Optional
+from urllib.parse import unquote, urlparse
+from .metrics import observe_external
 
-load_dotenv()
-
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_REGION", "us-east-1"),
-)
+# boto3 is synchronous; every S3 call runs on this bounded pool so the event
+# loop never blocks. The pool size is also the S3 concurrency limit, and the
+# client's HTTP connection pool is sized to match.
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "16"))
 
 BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "lyzr-procurement")
 FOLDER_PREFIX = "LYZR procurement"
 
+# Objects above the threshold go up as S3 multipart uploads, streamed from the
+# source file in threshold-sized parts rather than read into memory
+MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+
+# boto3 is imported and the client built on first storage use: loading
+# botocore's service model takes a noticeable part of a cold start
+_s3_client = None
+_transfer_config = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    global _s3_client, _transfer_config
+    if _s3_client is None:
+        with _client_lock:
+            if _s3_client is None:
+                import boto3
+                from boto3.s3.transfer import TransferConfig
+                from botocore.config import Config
+
+                _transfer_config = TransferConfig(
+                    multipart_threshold=MULTIPART_THRESHOLD,
+                    multipart_chunksize=MULTIPART_THRESHOLD,
+                    max_concurrency=4,
+                )
+                _s3_client = boto3.client(
+                    "s3",
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                    region_name=os.getenv("AWS_REGION", "us-east-1"),
+                    # Point at MinIO or another local S3 stand-in when set
+                    endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                    config=Config(
+                        max_pool_connections=S3_MAX_CONCURRENCY,
+                        connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", "5")),
+                        read_timeout=float(os.getenv("S3_READ_TIMEOUT", "60")),
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+    return _s3_client
+
+
+_executor = ThreadPoolExecutor(max_workers=S3_MAX_CONCURRENCY, thread_name_prefix="s3")
+
+# Content-addressed keys recently confirmed to exist in the bucket (this process
+# only). Entries are trusted for KNOWN_KEY_TTL seconds, so a key deleted from the
+# bucket is re-checked with head_object; least recently used entries are evicted
+KNOWN_KEYS_SIZE = int(os.getenv("KNOWN_KEYS_SIZE", "10000"))
+KNOWN_KEY_TTL = int(os.getenv("KNOWN_KEY_TTL", "300"))
+_known_content_keys: "OrderedDict[str, float]" = OrderedDict()
+_known_keys_lock = threading.Lock()
+
+# Presigned URLs are reused until they are within PRESIGN_REFRESH_MARGIN
+# seconds of expiring; least recently used entries are evicted past the cap
+PRESIGN_CACHE_SIZE = int(os.getenv("PRESIGN_CACHE_SIZE", "10000"))
+PRESIGN_REFRESH_MARGIN = int(os.getenv("PRESIGN_REFRESH_MARGIN", "3600"))
+_presign_cache: "OrderedDict[tuple[str, int], tuple[str, float]]" = OrderedDict()
+_presign_lock = threading.Lock()
+
+# Per-operation call timings, keyed by S3 operation name
+_metrics: dict[str, dict] = {}
+_metrics_lock = threading.Lock()
+
+
+async def upload_file_to_s3(
+    file_bytes: bytes, original_filename: str, document_type: str, content_addressed: bool = False
+) -> dict:
+    """Upload a file to S3 and return the S3 key + a presigned URL.
+
+    With content_addressed=True the key is derived from the SHA-256 of the
+    bytes, and the upload is skipped when that object already exists.
+    """
+    digest = hashlib.sha256(file_bytes).hexdigest() if content_addressed else None
+    return await upload_stream_to_s3(
+        io.BytesIO(file_bytes), original_filename, document_type, digest, content_addressed
+    )
+
+
+async def upload_stream_to_s3(
+    fileobj: BinaryIO,
+    original_filename: str,
+    document_type: str,
+    sha256: Optional[str] = None,
+    content_addressed: bool = False,
+) -> dict:
+    """Stream a file object to S3 (multipart above MULTIPART_THRESHOLD).
+
+    content_addressed requires the caller to pass the sha256 of the content.
+    """
+    if content_addressed and not sha256:
+        raise ValueError("content_addressed upload requires sha256")
+    return await _run(_upload_sync, fileobj, original_filename, document_type, sha256, content_addressed)
+
+
+async def generate_presigned_url(s3_key: str, expires_in: int = 604800) -> str:
+    """Generate a presigned URL for an S3 object. Default expiry: 7 days (604800s).
+
+    Served from the in-process cache while the cached URL is not close to expiry.
+    """
+    cached = _cached_presign(s3_key, expires_in)
+    if cached:
+        return cached
+    return await _run(_presign_sync, s3_key, expires_in)
+
+
+async def generate_presigned_urls(s3_keys: list[str], expires_in: int = 604800) -> dict[str, str]:
+    """Presign many keys at once; cache misses are signed in a single pool hop."""
+    urls = {}
+    missing = []
+    for key in dict.fromkeys(s3_keys):
+        cached = _cached_presign(key, expires_in)
+        if cached:
+            urls[key] = cached
+        else:
+            missing.append(key)
+    if missing:
+        signed = await _run(lambda: {key: _presign_sync(key, expires_in) for key in missing})
+        urls.update(signed)
+    return urls
+
+
+def s3_key_from_attachment(url_or_key: str) -> str:
+    """Older messages store full S3 URLs; newer ones store the bare key."""
+    if url_or_key.startswith("http"):
+        return unquote(urlparse(url_or_key).path.lstrip("/"))
+    return url_or_key
 
-def upload_file_to_s3(file_bytes: bytes, original_filename: str, document_type: str) -> dict:
-    """Upload a file to S3 and return the S3 key + a presigned URL."""
+
+def get_s3_metrics() -> dict:
+    """Snapshot of per-operation call counts, errors and latency (ms)."""
+    with _metrics_lock:
+        return {op: dict(m) for op, m in _metrics.items()}
+
+
+async def _run(fn, *args):
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context into the worker (request profiling reads it)
+    return await loop.run_in_executor(_executor, partial(contextvars.copy_context().run, fn, *args))
+
+
+@contextmanager
+def _timed(op: str):
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        elapsed_ms = elapsed * 1000
+        observe_external("s3", op, elapsed, "error" if failed else "ok")
+        with _metrics_lock:
+            m = _metrics.setdefault(op, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            m["calls"] += 1
+            m["errors"] += int(failed)
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+
+
+def _upload_sync(
+    fileobj: BinaryIO, original_filename: str, document_type: str, sha256: Optional[str], content_addressed: bool
+) -> dict:
     ext = os.path.splitext(original_filename)[1] if original_filename else ".pdf"
+
+    if content_addressed:
+        s3_key = f"{FOLDER_PREFIX}/{document_type}/sha256/{sha256}{ext}"
+        deduplicated = _object_exists(s3_key)
+        if not deduplicated:
+            _put_object(s3_key, fileobj, ext)
+            _remember_key(s3_key)
+        return {
+            "s3_key": s3_key,
+            "url": _presign_sync(s3_key),
+            "sha256": sha256,
+            "deduplicated": deduplicated,
+        }
+
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     unique_id = uuid.uuid4().hex[:8]
     s3_key = f"{FOLDER_PREFIX}/{document_type}/{timestamp}_{unique_id}{ext}"
+    _put_object(s3_key, fileobj, ext)
 
-    s3_client.put_object(
-        Bucket=BUCKET_NAME,
-        Key=s3_key,
-        Body=file_bytes,
-        ContentType=_get_content_type(ext),
-    )
-
-    presigned_url = generate_presigned_url(s3_key)
+    presigned_url = _presign_sync(s3_key)
     return {"s3_key": s3_key, "url": presigned_url}
 
 
-def generate_presigned_url(s3_key: str, expires_in: int = 604800) -> str:
-    """Generate a presigned URL for an S3 object. Default expiry: 7 days (604800s)."""
-    return s3_client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": BUCKET_NAME, "Key": s3_key},
-        ExpiresIn=expires_in,
-    )
+def _cached_presign(s3_key: str, expires_in: int):
+    with _presign_lock:
+        entry = _presign_cache.get((s3_key, expires_in))
+        if entry is None:
+            return None
+        url, expires_at = entry
+        if expires_at - time.time() <= PRESIGN_REFRESH_MARGIN:
+            del _presign_cache[(s3_key, expires_in)]
+            return None
+        _presign_cache.move_to_end((s3_key, expires_in))
+        return url
+
+
+def _presign_sync(s3_key: str, expires_in: int = 604800) -> str:
+    cached = _cached_presign(s3_key, expires_in)
+    if cached:
+        return cached
+    signed_at = time.time()
+    with _timed("generate_presigned_url"):
+        url = get_s3_client().generate_presigned_url(
+            "get_object",
+            Params={"Bucket": BUCKET_NAME, "Key": s3_key},
+            ExpiresIn=expires_in,
+        )
+    with _presign_lock:
+        _presign_cache[(s3_key, expires_in)] = (url, signed_at + expires_in)
+        _presign_cache.move_to_end((s3_key, expires_in))
+        while len(_presign_cache) > PRESIGN_CACHE_SIZE:
+            _presign_cache.popitem(last=False)
+    return url
+
+
+def _put_object(s3_key: str, fileobj: BinaryIO, ext: str) -> None:
+    client = get_s3_client()
+    with _timed("upload_fileobj"):
+        client.upload_fileobj(
+            fileobj,
+            BUCKET_NAME,
+            s3_key,
+            ExtraArgs={"ContentType": _get_content_type(ext)},
+            Config=_transfer_config,
+        )
+
+
+def _remember_key(s3_key: str) -> None:
+    with _known_keys_lock:
+        _known_content_keys[s3_key] = time.monotonic() + KNOWN_KEY_TTL
+        _known_content_keys.move_to_end(s3_key)
+        while len(_known_content_keys) > KNOWN_KEYS_SIZE:
+            _known_content_keys.popitem(last=False)
+
+
+def _key_known(s3_key: str) -> bool:
+    with _known_keys_lock:
+        expires_at = _known_content_keys.get(s3_key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del _known_content_keys[s3_key]
+            return False
+        _known_content_keys.move_to_end(s3_key)
+        return True
+
+
+def _object_exists(s3_key: str) -> bool:
+    if _key_known(s3_key):
+        return True
+    client = get_s3_client()
+    from botocore.exceptions import ClientError  # already loaded with the client
+
+    try:
+        with _timed("head_object"):
+            client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    _remember_key(s3_key)
+    return True
 
 
 def _get_content_type(ext: str) -> str:
@@ -0,0 +1,391 @@
+"""In-process full-text search over vendors, internal_vendors and contracts.
+
+Each collection gets an inverted index (term -> doc id -> field-weighted term
+frequency) over a projection of its searchable fields. Queries AND their
+terms, rank by weight x idf and treat the last term as a prefix for
+type-ahead. MongoDB $text indexes stem whole words and cannot prefix-match,
+hence the embedded index. Each worker holds its own copy; at 100k vendors
+that is a few hundred MB of searchable fields and postings.
+
+Sync: on a replica set or sharded cluster, `follow()` opens a change stream,
+then builds the indexes and applies every insert, update, replace and delete
+to them one document at a time, so writes from any worker (and
+internal_vendors imports, written outside the API) show up immediately. A standalone MongoDB has no change
+streams; the index is then reloaded every SEARCH_INDEX_TTL seconds instead.
+Loads stream the collection and yield to the event loop between chunks, and
+changes seen during a load are replayed onto the new index.
+"""
+import os
+import re
+import math
+import time
+import heapq
+import asyncio
+import bisect
+import operator
+from typing import Iterable, Optional
+
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", "300"))
+# Documents tokenized between yields to the event loop during a load
+SEARCH_LOAD_CHUNK = 500
+RESTART_DELAY = 1.0
+MIN_PREFIX_LENGTH = 2
+COMPLETION_FACTOR = 0.8
+MAX_PREFIX_EXPANSION = 500
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _values(doc, path: str) -> Iterable[str]:
+    """String values at a dotted path, descending into lists."""
+    head, _, rest = path.partition(".")
+    value = doc.get(head) if isinstance(doc, dict) else None
+    items = value if isinstance(value, list) else [value]
+    for item in items:
+        if item is None:
+            continue
+        if rest:
+            yield from _values(item, rest)
+        elif isinstance(item, (str, int, float)):
+            yield str(item)
+
+
+def _first(doc: dict, paths: tuple[str, ...]) -> Optional[str]:
+    for path in paths:
+        for value in _values(doc, path):
+            return value
+    return None
+
+
+class SearchSpec:
+    def __init__(self, fields: dict[str, float], name: tuple[str, ...], vendor_id: tuple[str, ...],
+                 extra: dict[str, tuple[str, ...]]):
+        self.fields = fields        # dotted path -> weight
+        self.name = name            # paths tried in order for the result's display name
+        self.vendor_id = vendor_id
+        self.extra = extra          # result key -> paths
+
+    @property
+    def projection(self) -> dict:
+        paths = set(self.fields) | set(self.name) | set(self.vendor_id)
+        for extra in self.extra.values():
+            paths.update(extra)
+        return {p: 1 for p in paths}
+
+
+SEARCH_SPECS = {
+    "vendors": SearchSpec(
+        fields={"vendor_name": 3.0, "vendor_id": 2.0, "vendor_type": 1.5,
+                "certifications_submitted": 1.5, "headquarters": 1.0},
+        name=("vendor_name",),
+        vendor_id=("vendor_id",),
+        extra={"vendor_type": ("vendor_type",), "headquarters": ("headquarters",)},
+    ),
+    "internal_vendors": SearchSpec(
+        fields={"vendor_profile.vendor_name": 3.0, "vendor_id": 2.0, "vendor_profile.vendor_id": 2.0,
+                "services_offered.service_category": 2.0, "services_offered.services": 1.5,
+                "certifications_and_compliance.certifications": 1.5,
+                "vendor_profile.vendor_type": 1.5, "vendor_profile.headquarters": 1.0},
+        name=("vendor_profile.vendor_name",),
+        vendor_id=("vendor_id", "vendor_profile.vendor_id"),
+        extra={"vendor_type": ("vendor_profile.vendor_type",), "headquarters": ("vendor_profile.headquarters",)},
+    ),
+    "contracts": SearchSpec(
+        fields={"vendor_name": 3.0, "contract_id": 2.0, "service_category": 2.0,
+                "services_provided": 1.5, "department": 1.0},
+        name=("vendor_name",),
+        vendor_id=("vendor_id",),
+        extra={"contract_id": ("contract_id",), "service_category": ("service_category",),
+               "contract_status": ("contract_status",)},
+    ),
+}
+
+
+class SearchIndex:
+    """Inverted index over one collection, updated one document at a time."""
+
+    def __init__(self, collection: str):
+        self.spec = SEARCH_SPECS[collection]
+        self.collection = collection
+        self.loaded_at = time.monotonic()
+        self.stale = False
+        # Documents get small integer slots (reused after removal): int-keyed
+        # postings stay compact and intersect much faster than ObjectId strings
+        self.slots: dict[str, int] = {}                     # doc id -> slot
+        self.results: list[Optional[dict]] = []             # slot -> search result
+        self.postings: dict[str, dict[int, float]] = {}     # term -> slot -> weight
+        self.terms: list[str] = []                          # sorted, for prefix expansion
+        self._doc_terms: list[Optional[dict[str, float]]] = []  # slot -> term -> weight
+        self._free: list[int] = []
+        self._loading = False
+
+    def __len__(self):
+        return len(self.slots)
+
+    def load(self, docs: Iterable[dict]):
+        """Index many documents at once (sorts the term list once at the end)."""
+        self.begin_load()
+        try:
+            for doc in docs:
+                self.upsert(doc)
+        finally:
+            self.finish_load()
+
+    def begin_load(self):
+        self._loading = True
+
+    def finish_load(self):
+        self._loading = False
+        self.terms = sorted(self.postings)
+
+    def upsert(self, doc: dict):
+        doc_id = str(doc.get("_id"))
+        self.remove(doc_id)
+        scores: dict[str, float] = {}
+        for path, weight in self.spec.fields.items():
+            for value in _values(doc, path):
+                for term in tokenize(value):
+                    scores[term] = scores.get(term, 0.0) + weight
+        if not scores:
+            return
+        result = {
+            "collection": self.collection,
+            "id": doc_id,
+            "vendor_id": _first(doc, self.spec.vendor_id),
+            "name": _first(doc, self.spec.name),
+            **{key: _first(doc, paths) for key, paths in self.spec.extra.items()},
+        }
+        if self._free:
+            slot = self._free.pop()
+            self.results[slot] = result
+            self._doc_terms[slot] = scores
+        else:
+            slot = len(self.results)
+            self.results.append(result)
+            self._doc_terms.append(scores)
+        self.slots[doc_id] = slot
+        for term, score in scores.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if not self._loading:
+                    bisect.insort(self.terms, term)
+            posting[slot] = score
+
+    def remove(self, doc_id: str):
+        slot = self.slots.pop(doc_id, None)
+        if slot is None:
+            return
+        scores = self._doc_terms[slot]
+        self.results[slot] = self._doc_terms[slot] = None
+        self._free.append(slot)
+        for term in scores:
+            posting = self.postings[term]
+            del posting[slot]
+            if not posting:
+                del self.postings[term]
+                if not self._loading:
+                    del self.terms[bisect.bisect_left(self.terms, term)]
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self.slots) / len(self.postings[term]))
+
+    def _expand(self, token: str, prefix: bool) -> list[str]:
+        if not prefix or len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.postings else []
+        start = bisect.bisect_left(self.terms, token)
+        hi = min(len(self.terms), start + MAX_PREFIX_EXPANSION)
+        end = bisect.bisect_left(self.terms, token + "\uffff", start, hi)
+        return self.terms[start:end]
+
+    def _matches(self, token: str, prefix: bool) -> Optional[tuple[dict[int, float], float]]:
+        """Postings for one query token as ({slot: weight}, factor); a prefix that
+        expands to several terms is merged into one dict with factor 1."""
+        terms = self._expand(token, prefix)
+        if not terms:
+            return None
+        if len(terms) == 1:
+            term = terms[0]
+            return self.postings[term], self._idf(term) * (1.0 if term == token else COMPLETION_FACTOR)
+        # Completions rank below the exact word; a doc matching several
+        # completions keeps the score of the rarest one
+        scores: dict[int, float] = {}
+        for term in sorted(terms, key=lambda t: -len(self.postings[t])):
+            factor = self._idf(term) * (1.0 if term == token else COMPLETION_FACTOR)
+            posting = self.postings[term]
+            scores.update(zip(posting, map(factor.__mul__, posting.values())))
+        return scores, 1.0
+
+    def search(self, tokens: list[str], prefix_last: bool, limit: int) -> list[tuple[float, dict]]:
+        if not tokens:
+            return []
+        matches = []
+        for i, token in enumerate(tokens):
+            match = self._matches(token, prefix_last and i == len(tokens) - 1)
+            if match is None:
+                return []
+            matches.append(match)
+        matches.sort(key=lambda m: len(m[0]))
+
+        postings, factor = matches[0]
+        if len(matches) == 1:
+            # One term: the factor doesn't change the order, so rank the raw weights
+            top = heapq.nlargest(limit, postings, key=postings.__getitem__)
+            return [(postings[slot] * factor, self.results[slot]) for slot in top]
+
+        # Intersect the doc ids, then sum the scores of those only; set operations
+        # and chained map() run in C, which matters with tens of thousands of candidates
+        candidates = postings.keys()
+        for other, _ in matches[1:]:
+            candidates = candidates & other.keys()
+            if not candidates:
+                return []
+        candidates = list(candidates)
+        totals = map(factor.__mul__, map(postings.__getitem__, candidates))
+        for other, factor in matches[1:]:
+            totals = map(operator.add, totals, map(factor.__mul__, map(other.__getitem__, candidates)))
+        top = heapq.nlargest(limit, zip(totals, candidates))
+        return [(score, self.results[slot]) for score, slot in top]
+
+
+class SearchService:
+    def __init__(self, collections: dict, ttl: int = SEARCH_INDEX_TTL):
+        self.collections = collections      # name -> Motor collection
+        self.ttl = ttl
+        self.indexes: dict[str, SearchIndex] = {}
+        self.following = False
+        self._loads: dict[str, asyncio.Task] = {}
+        self._pending: dict[str, list] = {}   # changes seen while a load runs
+        self._follower: Optional[asyncio.Task] = None
+        self._warmup: Optional[asyncio.Task] = None
+        self._stream_opens = 0   # loads started before the latest stream open may have missed writes
+
+    async def _load(self, name: str) -> SearchIndex:
+        index = SearchIndex(name)
+        opens = self._stream_opens
+        index.begin_load()
+        self._pending[name] = []
+        try:
+            cursor = self.collections[name].find({}, SEARCH_SPECS[name].projection, batch_size=SEARCH_LOAD_CHUNK)
+            count = 0
+            async for doc in cursor:
+                index.upsert(doc)
+                count += 1
+                if count % SEARCH_LOAD_CHUNK == 0:
+                    # Tokenizing holds the GIL; let queued requests run between chunks
+                    await asyncio.sleep(0)
+            index.finish_load()
+            for doc_id, document in self._pending[name]:
+                _apply(index, doc_id, document)
+        finally:
+            del self._pending[name]
+        index.stale = opens != self._stream_opens
+        self.indexes[name] = index
+        return index
+
+    async def index(self, name: str) -> SearchIndex:
+        """Current index for `name`; starts a background reload when stale.
+
+        Only the first load is awaited; later ones keep answering from the
+        current index, which change events keep updating meanwhile.
+        """
+        current = self.indexes.get(name)
+        stale = (
+            current is None
+            or current.stale
+            or (not self.following and time.monotonic() - current.loaded_at > self.ttl)
+        )
+        if stale and name not in self._loads:
+            task = asyncio.create_task(self._load(name))
+            self._loads[name] = task
+            task.add_done_callback(lambda _: self._loads.pop(name, None))
+        if current is None:
+            return await asyncio.shield(self._loads[name])
+        return current
+
+    def apply(self, name: str, doc_id, document: Optional[dict]):
+        """Upsert `document` into the index of `name`, or remove `doc_id` when it is None."""
+        if name not in self.collections:
+            return
+        pending = self._pending.get(name)
+        if pending is not None:
+            pending.append((doc_id, document))
+        index = self.indexes.get(name)
+        if index is not None:
+            _apply(index, doc_id, document)
+
+    def follow(self, db):
+        """Keep the indexes in sync from a change stream (replica set or sharded cluster only).
+
+        Builds the indexes once the stream is open; call this instead of warm().
+        """
+        if self._follower is None or self._follower.done():
+            self._follower = asyncio.create_task(self._follow(db))
+
+    async def stop(self):
+        self.following = False
+        for task in (self._follower, self._warmup):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._follower = self._warmup = None
+
+    async def _follow(self, db):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(self.collections)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        while True:
+            try:
+                async with db.watch(pipeline, full_document="updateLookup") as stream:
+                    # The stream's position is fixed once it is open, so loads started now
+                    # miss nothing: any later write arrives as an event and is replayed.
+                    # Indexes loaded (or loading) before it may lack writes made while no
+                    # stream was open, so they are reloaded
+                    self._stream_opens += 1
+                    for index in self.indexes.values():
+                        index.stale = True
+                    self.following = True
+                    self._warmup = asyncio.create_task(self.warm())
+                    async for change in stream:
+                        # fullDocument is None for deletes (and updates deleted before the lookup)
+                        self.apply(change["ns"]["coll"], change["documentKey"]["_id"], change.get("fullDocument"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Search change stream failed, reloading indexes once it resumes: {e}")
+            self.following = False
+            await asyncio.sleep(RESTART_DELAY)
+
+    async def warm(self):
+        for name in self.collections:
+            try:
+                if (await self.index(name)).stale:
+                    # Loaded from before the change stream opened; reload in the background
+                    await self.index(name)
+            except Exception as e:
+                print(f"Search index build for {name} failed: {e}")
+
+    async def search(self, query: str, collections: Iterable[str], limit: int) -> list[dict]:
+        tokens = tokenize(query)
+        # A trailing partial word is completed (type-ahead); "acme " searches "acme" exactly
+        prefix_last = bool(query) and not query[-1].isspace()
+        indexes = await asyncio.gather(*(self.index(name) for name in collections))
+        hits = []
+        for index in indexes:
+            hits.extend(index.search(tokens, prefix_last, limit))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [{**result, "score": round(score, 3)} for score, result in hits[:limit]]
+
+
+def _apply(index: SearchIndex, doc_id, document: Optional[dict]):
+    if document is None:
+        index.remove(str(doc_id))
+    else:
+        index.upsert(document)
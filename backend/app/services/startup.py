@@ -0,0 +1,58 @@
+"""Startup phase timings for the readiness report (GET /ready).
+
+The app lifespan runs each startup step inside `startup_report.phase(name)`,
+which records how long it took and whether it failed. Failures are logged and
+recorded but don't stop startup, matching how the old startup handlers behaved,
+unless the phase is `required` (e.g. invalid configuration): then the
+exception propagates and the app does not start.
+"""
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from .. import IMPORTED_AT
+
+
+class StartupReport:
+    def __init__(self):
+        self.phases: list[dict] = []
+        self.import_ms: Optional[float] = None
+        self.startup_ms: Optional[float] = None
+        self.ready = False
+        self._started: Optional[float] = None
+
+    def begin(self):
+        self._started = time.perf_counter()
+        self.import_ms = round((self._started - IMPORTED_AT) * 1000, 1)
+        self.phases = []
+        self.ready = False
+
+    @asynccontextmanager
+    async def phase(self, name: str, required: bool = False):
+        start = time.perf_counter()
+        entry = {"name": name, "status": "ok"}
+        try:
+            yield
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            print(f"Startup phase {name} failed: {e}")
+            if required:
+                raise
+        finally:
+            entry["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.phases.append(entry)
+
+    def finish(self):
+        self.startup_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        self.ready = True
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_ms": self.import_ms,
+            "startup_ms": self.startup_ms,
+            "phases": list(self.phases),
+        }
+
+
+startup_report = StartupReport()
@@ -0,0 +1,57 @@
+import os
+import asyncio
+import hashlib
+from fastapi import HTTPException, UploadFile
+
+# Multipart bodies are spooled to a temp file by Starlette; reading them back
+# in fixed-size chunks keeps per-upload memory at CHUNK_SIZE regardless of
+# the file size.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds maximum upload size of {MAX_UPLOAD_BYTES} bytes",
+    )
+
+
+async def hash_upload(file: UploadFile) -> tuple[int, str]:
+    """Read an upload chunk by chunk, returning (size, sha256 hex) and rewinding it.
+
+    Raises 413 as soon as the running size passes MAX_UPLOAD_BYTES.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+        digest.update(chunk)
+    await file.seek(0)
+    return size, digest.hexdigest()
+
+
+async def save_upload(file: UploadFile, path: str) -> tuple[int, str]:
+    """Stream an upload to disk chunk by chunk, returning (size, sha256 hex).
+
+    Disk writes run in a worker thread. A partial file is removed if the
+    upload goes over MAX_UPLOAD_BYTES or the write fails.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise _too_large()
+            digest.update(chunk)
+            await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(os.remove, path)
+        raise
+    await asyncio.to_thread(out.close)
+    return size, digest.hexdigest()
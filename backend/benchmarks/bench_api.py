@@ -0,0 +1,382 @@
+"""End-to-end API latency and throughput at fixed concurrency, with a baseline check.
+
+    python benchmarks/bench_api.py --scale 1k
+    MONGODB_URL=mongodb://localhost:27017 python benchmarks/bench_api.py --db mongod --scale 100k
+    python benchmarks/bench_api.py --scale 1k --save-baseline benchmarks/baseline-1k.json
+    python benchmarks/bench_api.py --scale 1k --baseline benchmarks/baseline-1k.json
+
+Boots app.main:app in-process (httpx ASGITransport; startup and shutdown
+handlers run) against mongomock-motor or a real mongod, with S3 mocked by
+moto. Seeds synthetic vendors, contracts, email threads and messages at the
+chosen scale, then drives each scenario with CONCURRENCY workers and prints
+p50/p95/p99/max latency (ms) and throughput as JSON.
+
+With --baseline, scenarios whose p95 grew or whose throughput dropped by more
+than --tolerance are listed under "regressions" and the exit status is 1.
+Compare runs of the same --db, --scale and machine only.
+
+With --db mongod the DATABASE_NAME database (default procurement_bench) is
+dropped and reseeded; names not containing "bench" are refused.
+
+Needs: pip install mongomock-motor moto
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+MESSAGES_PER_THREAD = 2
+SEED_BATCH = 10_000
+UPLOAD_BYTES = 64 * 1024
+
+CATEGORIES = ["Cloud Hosting", "IT Services", "Cybersecurity", "Logistics", "Facilities", "Marketing"]
+STATUSES = ["Active", "Active", "Active", "Expired", "Pending Renewal"]
+DEPARTMENTS = ["IT", "Finance", "Operations", "HR", "Legal"]
+RISK_LEVELS = ["Low", "Medium", "High"]
+CERTS = ["ISO 27001", "SOC 2", "ISO 9001", "HIPAA", "PCI DSS", "GDPR"]
+
+
+def vendor_id(i: int) -> str:
+    # Domain-style ids: /by-vendor-id/{vid} does not match ids containing "/"
+    return f"bench-vendor-{i}.example.com"
+
+
+def thread_id(i: int) -> str:
+    return f"THREAD-BENCH-{i}"
+
+
+def make_vendor(i: int, rng: random.Random) -> dict:
+    return {
+        "vendor_id": vendor_id(i),
+        "vendor_name": f"Bench Vendor {i}",
+        "quoted_price": rng.randint(1_000, 500_000),
+        "technical_compliance_status": rng.random() < 0.7,
+        "certifications_submitted": rng.sample(CERTS, 2),
+        "esg_declaration": rng.random() < 0.5,
+        "exceptions_noted": "",
+        "clarifications": [],
+        "response_date": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "thread_ids": [thread_id(i)],
+        "vendor_type": rng.choice(["SaaS", "Services", "Hardware"]),
+        "contact_email": f"sales@bench-vendor-{i}.example.com",
+        "contact_name": "Bench Contact",
+        "headquarters": "Austin, TX",
+        "website": f"https://{vendor_id(i)}",
+        "source": "internal",
+    }
+
+
+def make_contract(i: int, rng: random.Random) -> dict:
+    start = rng.randint(2022, 2025)
+    return {
+        "contract_id": f"BENCH-{i}",
+        "vendor_id": vendor_id(i),
+        "vendor_name": f"Bench Vendor {i}",
+        "service_category": rng.choice(CATEGORIES),
+        "services_provided": ["support"],
+        "contract_value_usd": float(rng.randint(10_000, 2_000_000)),
+        "billing_model": "Fixed",
+        "monthly_cost_usd": float(rng.randint(500, 50_000)),
+        "contract_start_date": f"{start}-01-01",
+        "contract_end_date": f"{start + rng.randint(1, 3)}-{rng.randint(1, 12):02d}-01",
+        "contract_status": rng.choice(STATUSES),
+        "department": rng.choice(DEPARTMENTS),
+        "business_unit": "Corporate",
+        "payment_terms": "Net 30",
+        "renewal_type": "Manual",
+        "risk_level": rng.choice(RISK_LEVELS),
+    }
+
+
+def make_thread(i: int, rng: random.Random) -> dict:
+    return {
+        "thread_id": thread_id(i),
+        "vendor_id": vendor_id(i),
+        "document_type": rng.choice(["RFQ", "RFP"]),
+        "subject": f"Bench requirement {i}",
+        "mandatory": [{"certificate": c, "is_submitted": ""} for c in CERTS[:3]],
+        "good_to_have": [{"certificate": c, "is_submitted": ""} for c in CERTS[3:]],
+        "summary": "",
+        "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+def make_message(i: int, n: int) -> dict:
+    return {
+        "message": f"Bench message {n} in thread {i}",
+        "attachment": [],
+        "thread_id": thread_id(i),
+        "sender": "customer" if n % 2 == 0 else "vendor",
+    }
+
+
+async def _insert(collection, docs):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == SEED_BATCH:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(db, count: int, rng: random.Random) -> dict:
+    t0 = time.perf_counter()
+    await _insert(db["vendors"], (make_vendor(i, rng) for i in range(count)))
+    await _insert(db["contracts"], (make_contract(i, rng) for i in range(count)))
+    await _insert(db["email_threads"], (make_thread(i, rng) for i in range(count)))
+    await _insert(db["messages"], (make_message(i, n) for i in range(count) for n in range(MESSAGES_PER_THREAD)))
+    return {"vendors": count, "contracts": count, "email_threads": count,
+            "messages": count * MESSAGES_PER_THREAD, "seconds": round(time.perf_counter() - t0, 2)}
+
+
+# Each scenario issues one request; `n` is a per-run counter, `count` the seeded scale.
+# The *_uncached variants add an ignored query parameter so every request misses the response cache.
+
+async def list_vendors(client, rng, n, count):
+    return await client.get("/api/vendors/", params={"limit": 100})
+
+
+async def list_vendors_uncached(client, rng, n, count):
+    return await client.get("/api/vendors/", params={"limit": 100, "_bench": n})
+
+
+async def list_contracts_uncached(client, rng, n, count):
+    return await client.get("/api/contracts/", params={"contract_status": "Active", "limit": 100, "_bench": n})
+
+
+async def vendor_by_vendor_id(client, rng, n, count):
+    return await client.get(f"/api/vendors/by-vendor-id/{vendor_id(rng.randrange(count))}")
+
+
+async def threads_by_vendor(client, rng, n, count):
+    return await client.get("/api/email-threads/by-vendor", params={"vendor_id": vendor_id(rng.randrange(count))})
+
+
+async def messages_by_thread(client, rng, n, count):
+    return await client.get(f"/api/messages/thread/{thread_id(rng.randrange(count))}")
+
+
+async def cert_status(client, rng, n, count):
+    return await client.put("/api/email-threads/cert-status", json={
+        "thread_id": thread_id(rng.randrange(count)),
+        "certificate": rng.choice(CERTS[:3]),
+        "field": "mandatory",
+        "is_submitted": "yes" if n % 2 else "",
+    })
+
+
+def _send_document_scenario(fanout: int):
+    async def send_document(client, rng, n, count):
+        # Half existing vendors (push a thread), half new ones (upsert)
+        vendors = [
+            {"vendor_id": vendor_id(rng.randrange(count)) if k % 2 == 0 else f"bench-new-{n}-{k}.example.com",
+             "vendor_name": f"Fan-out Vendor {k}", "contact_email": "sales@example.com"}
+            for k in range(fanout)
+        ]
+        return await client.put("/api/send-document/", json={
+            "vendors": vendors, "document_type": "RFQ", "subject": f"Bench fan-out {n}",
+            "mandatory": CERTS[:2], "good_to_have": CERTS[2:4],
+        })
+    return send_document
+
+
+async def upload(client, rng, n, count):
+    payload = rng.randbytes(UPLOAD_BYTES)
+    return await client.post(
+        "/api/s3-upload/",
+        data={"document_type": "RFQ", "thread_id": thread_id(rng.randrange(count))},
+        files={"file": (f"bench-{n}.pdf", payload, "application/pdf")},
+    )
+
+
+def scenarios(fanout: int) -> dict:
+    return {
+        "list_vendors": list_vendors,
+        "list_vendors_uncached": list_vendors_uncached,
+        "list_contracts_uncached": list_contracts_uncached,
+        "vendor_by_vendor_id": vendor_by_vendor_id,
+        "threads_by_vendor": threads_by_vendor,
+        "messages_by_thread": messages_by_thread,
+        "cert_status": cert_status,
+        f"send_document_x{fanout}": _send_document_scenario(fanout),
+        "upload": upload,
+    }
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict:
+    ms = sorted(x * 1000 for x in latencies)
+    if len(ms) >= 2:
+        q = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = ms[0] if ms else 0.0
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(ms[-1], 2) if ms else 0.0,
+        "throughput_rps": round(len(ms) / seconds, 1) if seconds else 0.0,
+    }
+
+
+async def run_scenario(client, scenario, count: int, requests: int, warmup: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    for n in range(warmup):
+        await scenario(client, rng, -n - 1, count)
+
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            t0 = time.perf_counter()
+            try:
+                r = await scenario(client, rng, n, count)
+                failed = r.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - t0)
+            errors += failed
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - t0)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> dict:
+    """Per-scenario p95 and throughput ratios against the baseline; regressions past `tolerance`."""
+    ratios, regressions = {}, []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        p95 = result["p95_ms"] / base["p95_ms"] if base["p95_ms"] else 1.0
+        rps = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 1.0
+        ratios[name] = {"p95": round(p95, 3), "throughput": round(rps, 3)}
+        if p95 > 1 + tolerance or rps < 1 - tolerance or result["errors"] > base["errors"]:
+            regressions.append(name)
+    return {"baseline_meta": baseline.get("meta"), "tolerance": tolerance,
+            "ratios": ratios, "regressions": regressions}
+
+
+def _prepare_environment(db_kind: str):
+    """Point the app at the benchmark database and mocked S3; must run before app imports."""
+    os.environ.setdefault("DATABASE_NAME", "procurement_bench")
+    for key, value in {"AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench",
+                       "AWS_REGION": "us-east-1", "S3_ENDPOINT_URL": "", "REDIS_URL": ""}.items():
+        os.environ[key] = value
+
+    from moto import mock_aws
+
+    aws = mock_aws()
+    aws.start()
+    if db_kind == "mongomock":
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    return aws
+
+
+async def _wait_for_indexes(timeout: float = 600):
+    from app.database.indexes import index_manager
+
+    deadline = time.monotonic() + timeout
+    while index_manager.status in ("pending", "building") and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+
+async def _run_all(app, count: int, args, results: dict):
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        await _wait_for_indexes()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+            for name, scenario in scenarios(args.fanout).items():
+                if args.only and name not in args.only:
+                    continue
+                results[name] = await run_scenario(
+                    client, scenario, count, args.requests, args.warmup, args.concurrency, args.seed
+                )
+                print(f"{name}: {results[name]}", file=sys.stderr)
+
+
+async def main(args) -> int:
+    count = SCALES[args.scale]
+    aws = _prepare_environment(args.db)
+    database_name = os.environ["DATABASE_NAME"]
+    if args.db == "mongod" and "bench" not in database_name:
+        sys.exit(f"Refusing to drop DATABASE_NAME={database_name!r}; use a name containing 'bench'")
+
+    import boto3
+    from app.main import app
+    from app.database.connection import client as mongo_client
+
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=os.getenv("S3_BUCKET_NAME", "lyzr-procurement"))
+    await mongo_client.drop_database(database_name)
+    seeded = await seed(mongo_client[database_name], count, random.Random(args.seed))
+
+    results = {}
+    try:
+        # The app's own prints would interleave with the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            await _run_all(app, count, args, results)
+    finally:
+        if args.db == "mongod":
+            await mongo_client.drop_database(database_name)
+        aws.stop()
+
+    report = {
+        "meta": {
+            "scale": args.scale, "db": args.db, "concurrency": args.concurrency, "requests": args.requests,
+            "python": platform.python_version(), "machine": platform.node(),
+            "started": datetime.now(timezone.utc).isoformat(timespec="seconds"), "seeded": seeded,
+        },
+        "scenarios": results,
+    }
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+        status = 1 if report["comparison"]["regressions"] else 0
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--db", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--fanout", type=int, default=10, help="vendors per send_document request")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--save-baseline", help="write this run as a baseline file")
+    parser.add_argument("--baseline", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95 / throughput change")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,92 @@
+"""Throughput of per-document PUT vs /bulk for contracts against a running API.
+
+    BASE_URL=http://localhost:8000 python benchmarks/bench_bulk.py --count 5000
+
+Creates COUNT contracts each way (prefixed BENCH-), prints docs/s as JSON,
+then deletes what it created through the same bulk endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+import httpx
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+
+
+def make_contract(i: int, run: str) -> dict:
+    return {
+        "contract_id": f"BENCH-{run}-{i}",
+        "vendor_id": f"bench-vendor-{i % 50}",
+        "vendor_name": f"Bench Vendor {i % 50}",
+        "service_category": "IT Services",
+        "services_provided": ["support"],
+        "contract_value_usd": 1000.0 + i,
+        "billing_model": "Fixed",
+        "monthly_cost_usd": 100.0,
+        "contract_start_date": "2025-01-01",
+        "contract_end_date": "2026-01-01",
+        "contract_status": "Active",
+        "department": "IT",
+        "business_unit": "Corporate",
+        "payment_terms": "Net 30",
+        "renewal_type": "Manual",
+        "risk_level": "Low",
+    }
+
+
+async def single_puts(client: httpx.AsyncClient, docs: list[dict], concurrency: int) -> list[str]:
+    sem = asyncio.Semaphore(concurrency)
+    ids = []
+
+    async def put(doc):
+        async with sem:
+            r = await client.put("/api/contracts/", json=doc, headers={"Prefer": "return=minimal"})
+            r.raise_for_status()
+            ids.append(r.json()["id"])
+
+    await asyncio.gather(*(put(d) for d in docs))
+    return ids
+
+
+async def bulk_create(client: httpx.AsyncClient, docs: list[dict], batch: int) -> list[str]:
+    ids = []
+    for start in range(0, len(docs), batch):
+        ops = [{"op": "create", "doc": d} for d in docs[start:start + batch]]
+        r = await client.post("/api/contracts/bulk", json=ops)
+        r.raise_for_status()
+        ids += [item["id"] for item in r.json()["results"] if item["status"] == "ok"]
+    return ids
+
+
+async def main(count: int, concurrency: int, batch: int):
+    run = uuid.uuid4().hex[:6]
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=120) as client:
+        t0 = time.perf_counter()
+        single_ids = await single_puts(client, [make_contract(i, run + "s") for i in range(count)], concurrency)
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        bulk_ids = await bulk_create(client, [make_contract(i, run + "b") for i in range(count)], batch)
+        bulk_s = time.perf_counter() - t0
+
+        cleanup = [{"op": "delete", "id": i} for i in single_ids + bulk_ids]
+        for start in range(0, len(cleanup), batch):
+            await client.post("/api/contracts/bulk", json=cleanup[start:start + batch])
+
+    print(json.dumps({
+        "count": count,
+        "single_put": {"seconds": round(single_s, 3), "docs_per_s": round(count / single_s, 1)},
+        "bulk": {"seconds": round(bulk_s, 3), "docs_per_s": round(count / bulk_s, 1), "batch": batch},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.concurrency, args.batch))
@@ -0,0 +1,98 @@
+"""Search latency over a synthetic internal-vendor catalog.
+
+    python benchmarks/bench_search.py --vendors 100000
+
+Builds the in-process index from generated documents (no database needed) and
+prints build time, single-document update time and p50/p95/max query latency
+in milliseconds as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search import SearchIndex, tokenize  # noqa: E402
+
+WORDS = ["acme", "global", "cloud", "data", "secure", "logistics", "analytics", "systems", "partners",
+         "digital", "networks", "solutions", "consulting", "labs", "health", "energy", "retail", "supply"]
+CATEGORIES = ["Cloud Hosting", "IT Services", "Cybersecurity", "Logistics", "Facilities", "Marketing",
+              "Legal Services", "Staffing", "Hardware", "Software Licensing"]
+SERVICES = ["IaaS", "Backup", "Managed SOC", "Penetration Testing", "Freight", "Warehousing",
+            "SEO", "Recruiting", "Laptops", "ERP", "Payroll", "Helpdesk"]
+CERTS = ["ISO 27001", "SOC 2", "ISO 9001", "HIPAA", "PCI DSS", "GDPR"]
+CITIES = ["Austin, TX", "Boston, MA", "London, UK", "Berlin, DE", "Bangalore, IN", "Toronto, CA"]
+QUERIES = ["acme", "acm", "cloud host", "iso 270", "secure data", "soc", "logistics bost",
+           "penetration", "glob", "analytics lab", "zzz", "payroll staff"]
+
+
+def make_vendor(i: int, rng: random.Random) -> dict:
+    name = " ".join(rng.sample(WORDS, 2)).title() + f" {i}"
+    return {
+        "_id": i,
+        "vendor_profile": {
+            "vendor_id": f"https://vendor-{i}.example.com",
+            "vendor_name": name,
+            "vendor_type": rng.choice(["SaaS", "Services", "Hardware"]),
+            "headquarters": rng.choice(CITIES),
+        },
+        "services_offered": [
+            {"service_category": c, "services": rng.sample(SERVICES, 2)}
+            for c in rng.sample(CATEGORIES, 2)
+        ],
+        "certifications_and_compliance": {"certifications": rng.sample(CERTS, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendors", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = [make_vendor(i, rng) for i in range(args.vendors)]
+    start = time.perf_counter()
+    index = SearchIndex("internal_vendors")
+    index.load(docs)
+    build_s = time.perf_counter() - start
+
+    # What a change-stream event costs: re-index one document
+    updates = []
+    for i in rng.sample(range(args.vendors), min(1000, args.vendors)):
+        doc = make_vendor(i, rng)
+        start = time.perf_counter()
+        index.upsert(doc)
+        updates.append((time.perf_counter() - start) * 1000)
+
+    latencies = {}
+    for query in QUERIES:
+        tokens, prefix = tokenize(query), not query.endswith(" ")
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            index.search(tokens, prefix, args.limit)
+            samples.append((time.perf_counter() - start) * 1000)
+        latencies[query] = samples
+
+    everything = sorted(s for samples in latencies.values() for s in samples)
+    print(json.dumps({
+        "vendors": args.vendors,
+        "terms": len(index.terms),
+        "build_s": round(build_s, 2),
+        "update_p50_ms": round(statistics.median(updates), 3),
+        "update_max_ms": round(max(updates), 3),
+        "p50_ms": round(statistics.median(everything), 2),
+        "p95_ms": round(everything[int(len(everything) * 0.95) - 1], 2),
+        "max_ms": round(everything[-1], 2),
+        "median_ms_by_query": {q: round(statistics.median(s), 2) for q, s in latencies.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
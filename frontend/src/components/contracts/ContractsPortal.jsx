@@ -2,10 +2,20 @@ import { useState, useEffect } from 'react'
 import { AlertCircle } from 'lucide-react'
 import ContractTable from './ContractTable'
 import VendorDetailPage from './VendorDetailPage'
-import backendApi from '../../services/backendApi'
+import { fetchAllPages, fetchContractSummary } from '../../services/backendApi'
+
+// Only the columns ContractTable renders or filters on
+const CONTRACT_TABLE_FIELDS = [
+  'contract_id', 'vendor_id', 'vendor_name', 'service_category', 'contract_value_usd',
+  'contract_status', 'risk_level', 'department', 'contract_start_date', 'contract_end_date'
+].join(',')
+
+const formatUsd = (value) =>
+  new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD', notation: 'compact' }).format(value || 0)
 
 export default function ContractsPortal() {
   const [contracts, setContracts] = useState([])
+  const [summary, setSummary] = useState(null)
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState(null)
   const [selectedVendorId, setSelectedVendorId] = useState(null)
@@ -18,8 +28,13 @@ export default function ContractsPortal() {
     try {
       setIsLoading(true)
       setError(null)
-      const response = await backendApi.get('/api/contracts')
-      setContracts(response.data || [])
+      // Totals and counts are aggregated server-side (GET /api/analytics/contracts/summary)
+      const [contractRows, summaryData] = await Promise.all([
+        fetchAllPages('/api/contracts', { fields: CONTRACT_TABLE_FIELDS }),
+        fetchContractSummary({ expiringWithinDays: 90, expiringLimit: 1 }).catch(() => null)
+      ])
+      setContracts(contractRows)
+      setSummary(summaryData)
     } catch (err) {
       console.error('Failed to fetch contracts:', err)
       setError(err.message || 'Failed to fetch contracts')
@@ -62,6 +77,34 @@ export default function ContractsPortal() {
         </div>
       </div>
 
+      {/* Summary */}
+      {summary && (
+        <div className="px-6 py-3 border-b border-lyzr-cream bg-white flex flex-wrap gap-6 text-sm">
+          <div>
+            <p className="text-lyzr-mid-4">Contracts</p>
+            <p className="font-semibold text-lyzr-congo">{summary.totals.contracts}</p>
+          </div>
+          <div>
+            <p className="text-lyzr-mid-4">Total value</p>
+            <p className="font-semibold text-lyzr-congo">{formatUsd(summary.totals.total_value_usd)}</p>
+          </div>
+          <div>
+            <p className="text-lyzr-mid-4">Monthly cost</p>
+            <p className="font-semibold text-lyzr-congo">{formatUsd(summary.totals.monthly_cost_usd)}</p>
+          </div>
+          {summary.by_status.map(({ contract_status, count }) => (
+            <div key={contract_status ?? 'none'}>
+              <p className="text-lyzr-mid-4">{contract_status || 'No status'}</p>
+              <p className="font-semibold text-lyzr-congo">{count}</p>
+            </div>
+          ))}
+          <div>
+            <p className="text-lyzr-mid-4">Expiring in 90 days</p>
+            <p className="font-semibold text-lyzr-ferra">{summary.expiring_soon.count}</p>
+          </div>
+        </div>
+      )}
+
       {/* Error Message */}
       {error && (
         <div className="mx-6 mt-4 p-4 bg-red-50 border border-red-200 rounded-lg flex items-start gap-3">
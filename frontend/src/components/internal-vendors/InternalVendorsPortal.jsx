@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { AlertCircle, Search, Building2, MapPin, Star } from 'lucide-react'
 import VendorDetailPage from '../contracts/VendorDetailPage'
-import backendApi from '../../services/backendApi'
+import { fetchAllPages } from '../../services/backendApi'
 
 export default function InternalVendorsPortal({ preSelectedVendorId, onClearPreSelected }) {
   const [vendors, setVendors] = useState([])
@@ -26,8 +26,7 @@ export default function InternalVendorsPortal({ preSelectedVendorId, onClearPreS
     try {
       setIsLoading(true)
       setError(null)
-      const response = await backendApi.get('/api/internal-vendors/')
-      setVendors(response.data || [])
+      setVendors(await fetchAllPages('/api/internal-vendors/', { fast: true }))
     } catch (err) {
       console.error('Failed to fetch internal vendors:', err)
       setError(err.message || 'Failed to fetch vendors')
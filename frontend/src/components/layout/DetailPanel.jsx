@@ -3,7 +3,7 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { X, Download, ArrowLeft, CheckCircle, FileText, ClipboardList, Scale, Loader } from 'lucide-react'
 import { useChatStore } from '../../store/chatStore'
 import { callCertificationAgent } from '../../services/api'
-import { sendDocumentToVendors, uploadDocumentToS3 } from '../../services/backendApi'
+import { sendDocumentToVendors, uploadDocumentToThreads } from '../../services/backendApi'
 import Button from '../ui/Button'
 import VendorTable from '../vendors/VendorTable'
 import VendorDetails from '../vendors/VendorDetails'
@@ -113,12 +113,9 @@ export default function DetailPanel() {
       if (allResults.length > 0) {
         const docBlob = new Blob([currentChat.rfqDocument], { type: 'application/pdf' })
         const filename = `RFQ_${new Date().toISOString().split('T')[0]}.pdf`
-        await Promise.all(
-          allResults.map(v =>
-            uploadDocumentToS3({ fileBlob: docBlob, filename, documentType: 'RFQ', threadId: v.thread_id })
-              .catch(err => console.warn(`[DetailPanel] S3 upload failed for ${v.vendor_name}:`, err.message))
-          )
-        )
+        await uploadDocumentToThreads({
+          fileBlob: docBlob, filename, documentType: 'RFQ', threadIds: allResults.map(v => v.thread_id)
+        }).catch(err => console.warn('[DetailPanel] S3 upload failed:', err.message))
       }
     }
 
@@ -214,12 +211,9 @@ export default function DetailPanel() {
         if (allResults.length > 0) {
           const docBlob = new Blob([currentChat.rfpDocument], { type: 'application/pdf' })
           const filename = `RFP_${new Date().toISOString().split('T')[0]}.pdf`
-          await Promise.all(
-            allResults.map(v =>
-              uploadDocumentToS3({ fileBlob: docBlob, filename, documentType: 'RFP', threadId: v.thread_id })
-                .catch(err => console.warn(`[DetailPanel] S3 upload (RFP) failed for ${v.vendor_name}:`, err.message))
-            )
-          )
+          await uploadDocumentToThreads({
+            fileBlob: docBlob, filename, documentType: 'RFP', threadIds: allResults.map(v => v.thread_id)
+          }).catch(err => console.warn('[DetailPanel] S3 upload (RFP) failed:', err.message))
         }
       }
 
@@ -4,7 +4,7 @@ import { Send, Download, Edit3, Save, X, Eye, FileText, Loader, Search } from 'l
 import Button from '../ui/Button'
 import { useChatStore } from '../../store/chatStore'
 import { PDFDocument, rgb } from 'pdf-lib'
-import { sendDocumentToVendors, uploadDocumentToS3 } from '../../services/backendApi'
+import { sendDocumentToVendors, uploadDocumentToThreads } from '../../services/backendApi'
 import { callCertificationAgent } from '../../services/api'
 
 // Strip HTML tags to plain text
@@ -298,16 +298,12 @@ export default function RFQPdfPreview({ rfqDocument, documentType = 'RFQ' }) {
           const pdfBlob = await generatePdf(editableContent)
           if (pdfBlob) {
             const filename = `${documentType}_${new Date().toISOString().split('T')[0]}.pdf`
-            await Promise.all(
-              allResults.map(v =>
-                uploadDocumentToS3({
-                  fileBlob: pdfBlob,
-                  filename,
-                  documentType,
-                  threadId: v.thread_id
-                }).catch(err => console.warn(`[RFQPdfPreview] S3 upload failed for ${v.vendor_name}:`, err.message))
-              )
-            )
+            await uploadDocumentToThreads({
+              fileBlob: pdfBlob,
+              filename,
+              documentType,
+              threadIds: allResults.map(v => v.thread_id)
+            }).catch(err => console.warn('[RFQPdfPreview] S3 upload failed:', err.message))
           }
         }
       } catch (err) {
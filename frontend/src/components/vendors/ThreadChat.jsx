@@ -5,17 +5,20 @@ import {
   AlertCircle, Loader, Info, Download, ExternalLink, Scale, Edit3
 } from 'lucide-react'
 import Badge from '../ui/Badge'
-import { fetchThreadMessages, createMessage, updateCertStatus, getPresignedUrl } from '../../services/backendApi'
+import { fetchThreadMessages, createMessage, updateCertStatuses, getPresignedUrl, subscribeThreadEvents } from '../../services/backendApi'
 import { callOcrAgent, callCertVerifierAgent, callNegotiationAgent, fetchNegotiationHistory } from '../../services/api'
 
-function AttachmentLink({ urlOrKey, message, isVendor }) {
-  const [href, setHref] = useState(null)
+function AttachmentLink({ urlOrKey, presignedUrl, message, isVendor }) {
+  const [href, setHref] = useState(presignedUrl || null)
   const [loading, setLoading] = useState(false)
   const fileName = decodeURIComponent((urlOrKey || '').split('/').pop()) || 'Attachment'
 
   const handleClick = async (e) => {
-    if (href) return // Already resolved
     e.preventDefault()
+    if (href) {
+      window.open(href, '_blank')
+      return
+    }
     setLoading(true)
     try {
       const presignedUrl = await getPresignedUrl(urlOrKey)
@@ -83,6 +86,9 @@ function AttachmentLink({ urlOrKey, message, isVendor }) {
   )
 }
 
+// Verification results that settle within this window go out as one batch update
+const CERT_STATUS_BATCH_MS = 500
+
 export default function ThreadChat({ thread, vendorName }) {
   const [messages, setMessages] = useState([])
   const [negotiationMessages, setNegotiationMessages] = useState([])  // from session history API
@@ -99,6 +105,9 @@ export default function ThreadChat({ thread, vendorName }) {
   const [certUploads, setCertUploads] = useState({})
   const messagesEndRef = useRef(null)
   const fileInputRefs = useRef({})
+  // Cert statuses waiting to be written: { threadId, updates: [{ certificate, field, isSubmitted }] }
+  const pendingCertStatuses = useRef(null)
+  const certStatusTimer = useRef(null)
 
   // Helper: get cert name from string or object format
   const getCertName = (cert) => typeof cert === 'string' ? cert : cert.certificate
@@ -176,6 +185,26 @@ export default function ThreadChat({ thread, vendorName }) {
     }
   }, [thread?.thread_id])
 
+  // Live updates: append new vendor replies instead of refetching the thread
+  useEffect(() => {
+    if (!thread?.thread_id) return
+    return subscribeThreadEvents({ threadIds: [thread.thread_id] }, (event) => {
+      if (event.type === 'reset') {
+        loadMessages()
+      } else if (event.collection === 'messages' && event.document?.id) {
+        setMessages(prev => {
+          if (prev.some(m => m.id === event.document.id)) {
+            return prev.map(m => (m.id === event.document.id ? { ...m, ...event.document } : m))
+          }
+          return event.operation === 'insert' ? [...prev, event.document] : prev
+        })
+      }
+    })
+  }, [thread?.thread_id])
+
+  // Write any queued cert statuses before switching threads or unmounting
+  useEffect(() => () => flushCertStatuses(), [thread?.thread_id])
+
   // Auto-scroll to bottom
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -318,6 +347,27 @@ export default function ThreadChat({ thread, vendorName }) {
     }
   }
 
+  const flushCertStatuses = () => {
+    clearTimeout(certStatusTimer.current)
+    const pending = pendingCertStatuses.current
+    pendingCertStatuses.current = null
+    if (!pending) return
+    updateCertStatuses(pending)
+      .then(({ unmatched }) => {
+        if (unmatched?.length) console.warn('[ThreadChat] certificates not on thread:', unmatched.map(u => u.certificate).join(', '))
+      })
+      .catch(err => console.warn('[ThreadChat] cert status update failed:', err.message))
+  }
+
+  // Several uploads can be verifying at once; their results share one request
+  const queueCertStatus = (update) => {
+    if (pendingCertStatuses.current?.threadId !== thread.thread_id) flushCertStatuses()
+    if (!pendingCertStatuses.current) pendingCertStatuses.current = { threadId: thread.thread_id, updates: [] }
+    pendingCertStatuses.current.updates.push(update)
+    clearTimeout(certStatusTimer.current)
+    certStatusTimer.current = setTimeout(flushCertStatuses, CERT_STATUS_BATCH_MS)
+  }
+
   const handleCertUpload = async (certName, file, field) => {
     // Generate a unique session ID per upload (not the thread ID)
     const sessionId = `VERIFY-${Date.now()}-${Math.random().toString(36).substring(2, 8)}`
@@ -372,12 +422,7 @@ export default function ThreadChat({ thread, vendorName }) {
         }).then(msg => setMessages(prev => [...prev, msg])).catch(() => {})
 
         // Step 3: Update thread in MongoDB with verification status
-        await updateCertStatus({
-          threadId: thread.thread_id,
-          certificate: certName,
-          field,
-          isSubmitted: verifyResult.validation_status
-        }).catch(err => console.warn('[ThreadChat] cert status update failed:', err.message))
+        queueCertStatus({ certificate: certName, field, isSubmitted: verifyResult.validation_status })
       } catch (verifyErr) {
         console.warn('[ThreadChat] cert verification failed:', verifyErr.message)
         setCertUploads(prev => ({
@@ -704,7 +749,7 @@ export default function ThreadChat({ thread, vendorName }) {
                       {msg.attachment?.length > 0 && (
                         <div className="mt-2 space-y-1.5">
                           {msg.attachment.map((urlOrKey, i) => (
-                            <AttachmentLink key={i} urlOrKey={urlOrKey} message={msg.message} isVendor={isVendor} />
+                            <AttachmentLink key={i} urlOrKey={urlOrKey} presignedUrl={msg.attachment_urls?.[urlOrKey]} message={msg.message} isVendor={isVendor} />
                           ))}
                         </div>
                       )}
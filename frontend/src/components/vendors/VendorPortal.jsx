@@ -10,7 +10,18 @@ import Button from '../ui/Button'
 import ThreadChat from './ThreadChat'
 import { useChatStore } from '../../store/chatStore'
 import { callCertificationAgent } from '../../services/api'
-import { fetchAllVendors, fetchVendorThreads, sendDocumentToVendors } from '../../services/backendApi'
+import { fetchAllVendors, fetchVendorFull, sendDocumentToVendors } from '../../services/backendApi'
+
+// A vendor's newest threads (the endpoint's default of 50), newest first. Messages
+// are left out; ThreadChat loads them for the thread the user opens
+const loadVendorThreads = async (vendorId) => {
+  const { threads } = await fetchVendorFull(vendorId, { messages: false })
+  return [...threads].sort((a, b) => {
+    const ta = a.created_at ? new Date(a.created_at).getTime() : 0
+    const tb = b.created_at ? new Date(b.created_at).getTime() : 0
+    return tb - ta
+  })
+}
 
 // Extract creation timestamp from MongoDB ObjectId (first 8 hex chars = seconds since epoch)
 const objectIdToDate = (id) => {
@@ -68,13 +79,7 @@ export default function VendorPortal() {
     setSelectedThread(null)
     setIsLoadingThreads(true)
     try {
-      const data = await fetchVendorThreads(vendor.vendor_id)
-      // Sort threads by created_at — newest first
-      const sorted = [...data].sort((a, b) => {
-        const ta = a.created_at ? new Date(a.created_at).getTime() : 0
-        const tb = b.created_at ? new Date(b.created_at).getTime() : 0
-        return tb - ta
-      })
+      const sorted = await loadVendorThreads(vendor.vendor_id)
       setThreads(sorted)
       if (sorted.length > 0) {
         setSelectedThread(sorted[0])
@@ -196,12 +201,7 @@ export default function VendorPortal() {
       })
       setSendSuccess(docType)
       // Reload threads for this vendor (sorted newest first)
-      const data = await fetchVendorThreads(selectedVendor.vendor_id)
-      const sorted = [...data].sort((a, b) => {
-        const ta = a.created_at ? new Date(a.created_at).getTime() : 0
-        const tb = b.created_at ? new Date(b.created_at).getTime() : 0
-        return tb - ta
-      })
+      const sorted = await loadVendorThreads(selectedVendor.vendor_id)
       setThreads(sorted)
       if (sorted.length > 0) setSelectedThread(sorted[0])
       setTimeout(() => setSendSuccess(null), 3000)
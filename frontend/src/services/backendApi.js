@@ -7,6 +7,22 @@ const api = axios.create({
   headers: { 'Content-Type': 'application/json' }
 })
 
+/**
+ * GET every page of a list endpoint. Lists return one keyset page at a time
+ * (1000 rows unless `limit` is given) and the cursor for the next one in
+ * X-Next-Cursor; pages are followed until there is none.
+ */
+export async function fetchAllPages(path, params = {}) {
+  const items = []
+  let cursor
+  do {
+    const { data, headers } = await api.get(path, { params: { ...params, cursor } })
+    items.push(...data)
+    cursor = headers['x-next-cursor']
+  } while (cursor)
+  return items
+}
+
 /**
  * Send document (RFQ/RFP) to vendors via backend.
  * Creates vendor records + threads.
@@ -43,28 +59,67 @@ export async function sendDocumentToVendors({ vendors, documentType, subject, qu
  * Get all vendors from backend
  */
 export async function fetchAllVendors() {
-  const { data } = await api.get('/api/vendors/')
-  return data
+  return fetchAllPages('/api/vendors/', { fast: true })
 }
 
 /**
  * Get threads for a specific vendor by vendor_id (website URL as query param)
  */
 export async function fetchVendorThreads(vendorId) {
-  const { data } = await api.get('/api/email-threads/by-vendor', {
-    params: { vendor_id: vendorId }
-  })
-  return data
+  return fetchAllPages('/api/email-threads/by-vendor', { vendor_id: vendorId })
 }
 
 /**
- * Get messages for a specific thread
+ * Get messages for a specific thread, with presigned attachment URLs inlined
+ * (msg.attachment_urls) so the thread opens without one presign call per file
  */
 export async function fetchThreadMessages(threadId) {
-  const { data } = await api.get(`/api/messages/thread/${threadId}`)
+  return fetchAllPages(`/api/messages/thread/${threadId}`, { presign: true })
+}
+
+/**
+ * Dashboard aggregates computed server-side: totals, spend by department,
+ * counts by status / risk level and contracts expiring soon.
+ */
+export async function fetchContractSummary({ expiringWithinDays = 90, expiringLimit = 20 } = {}) {
+  const { data } = await api.get('/api/analytics/contracts/summary', {
+    params: { expiring_within_days: expiringWithinDays, expiring_limit: expiringLimit }
+  })
   return data
 }
 
+/**
+ * Ranked search over vendors, internal vendors and contracts.
+ * The last word is prefix-matched, so this works for type-ahead.
+ * With documents: true each result carries its full record as `document`.
+ */
+export async function searchCatalog(query, { collections, limit = 20, documents = false } = {}) {
+  const params = new URLSearchParams({ q: query, limit, documents })
+  ;(collections || []).forEach(c => params.append('collection', c))
+  const { data } = await api.get(`/api/search?${params}`)
+  return data.results
+}
+
+/**
+ * Subscribe to live message / thread changes (server-sent events).
+ * onEvent receives { type, collection, operation, thread_id, vendor_id, document };
+ * type 'reset' means events were missed and the caller should refetch.
+ * Returns an unsubscribe function.
+ */
+export function subscribeThreadEvents({ threadIds = [], vendorIds = [] }, onEvent) {
+  const params = new URLSearchParams()
+  threadIds.forEach(id => params.append('thread_id', id))
+  vendorIds.forEach(id => params.append('vendor_id', id))
+  const source = new EventSource(`${BACKEND_URL}/api/realtime/events?${params}`)
+
+  const handle = (e) => onEvent({ type: e.type, ...JSON.parse(e.data) })
+  const types = ['messages.insert', 'messages.update', 'messages.replace',
+    'email_threads.insert', 'email_threads.update', 'email_threads.replace', 'reset']
+  types.forEach(type => source.addEventListener(type, handle))
+
+  return () => source.close()
+}
+
 /**
  * Upload a file to the backend
  */
@@ -108,6 +163,25 @@ export async function uploadDocumentToS3({ fileBlob, filename, documentType, thr
   return data
 }
 
+/**
+ * Upload one RFQ/RFP document and attach it to many threads in a single request.
+ * The backend stores it once under a content-hash key and creates one message per thread.
+ * @param {Blob} fileBlob - The PDF blob
+ * @param {string} filename - e.g. "RFQ_2025-02-12.pdf"
+ * @param {string} documentType - "RFQ" or "RFP" or "Contract"
+ * @param {string[]} threadIds - The thread_ids to associate with
+ */
+export async function uploadDocumentToThreads({ fileBlob, filename, documentType, threadIds }) {
+  const formData = new FormData()
+  formData.append('file', fileBlob, filename)
+  formData.append('document_type', documentType)
+  threadIds.forEach(id => formData.append('thread_ids', id))
+  const { data } = await api.post('/api/s3-upload/multi', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' }
+  })
+  return data
+}
+
 /**
  * Update a certification's is_submitted status in a thread
  * @param {string} threadId - The thread_id
@@ -125,6 +199,20 @@ export async function updateCertStatus({ threadId, certificate, field, isSubmitt
   return data
 }
 
+/**
+ * Update many certifications' is_submitted status in a thread with one atomic request
+ * @param {string} threadId - The thread_id
+ * @param {{certificate: string, field: string, isSubmitted: string}[]} updates
+ * @returns {Promise<{mandatory, good_to_have, unmatched}>}
+ */
+export async function updateCertStatuses({ threadId, updates }) {
+  const { data } = await api.put('/api/email-threads/cert-status/batch', {
+    thread_id: threadId,
+    updates: updates.map(u => ({ certificate: u.certificate, field: u.field, is_submitted: u.isSubmitted }))
+  })
+  return data
+}
+
 /**
  * Get a presigned URL for an S3 object (7-day expiry).
  * Handles both old full URLs and new S3 keys.
@@ -156,4 +244,23 @@ export async function fetchVendorByVendorId(vendorId) {
   return data
 }
 
+/**
+ * Get a vendor with its threads and compliance records in a single request.
+ * Optional per-section limits (at least 1): threadLimit, messageLimit, complianceLimit.
+ * Pass messages: false to get the threads without their messages, and presign: true
+ * to inline presigned attachment URLs (msg.attachment_urls) when messages are included.
+ */
+export async function fetchVendorFull(vendorId, { threadLimit, messageLimit, complianceLimit, messages = true, presign = false } = {}) {
+  const { data } = await api.get(`/api/vendors/${encodeURIComponent(vendorId)}/full`, {
+    params: {
+      thread_limit: threadLimit,
+      message_limit: messageLimit,
+      compliance_limit: complianceLimit,
+      messages,
+      presign
+    }
+  })
+  return data
+}
+
 export default api
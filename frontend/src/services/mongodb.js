@@ -5,6 +5,8 @@
  * For demo purposes, we'll simulate the MongoDB query logic.
  */
 
+import { searchCatalog } from './backendApi'
+
 const MONGODB_URI = import.meta.env.VITE_MONGODB_URI
 
 // Mock vendor data for demonstration (based on the provided schema)
@@ -298,16 +300,40 @@ const MOCK_VENDORS = [
 ]
 
 /**
- * Query vendors from MongoDB (simulated)
+ * Query internal vendors through the backend search (GET /api/search)
  * @param {Object} query - Query parameters
  * @param {string[]} query.vendorNames - Vendor names to search
  * @param {string[]} query.categories - Service categories to search
  * @returns {Promise<Object[]>} - Matching vendors
+ *
+ * Each name or category is searched separately and the matches are combined
+ * (OR logic, ranked order kept). Falls back to the mock data when the
+ * backend is unreachable.
  */
 export async function queryVendors({ vendorNames = [], categories = [] }) {
-  // Simulate network delay
-  await new Promise(resolve => setTimeout(resolve, 500))
+  const terms = [...vendorNames, ...categories].filter(Boolean)
+  if (terms.length === 0) {
+    return filterMockVendors({ vendorNames, categories })
+  }
 
+  try {
+    const hits = await Promise.all(
+      terms.map(term => searchCatalog(term, { collections: ['internal_vendors'], documents: true }))
+    )
+    const vendors = new Map()
+    hits.flat().forEach(hit => {
+      if (hit.document && !vendors.has(hit.id)) vendors.set(hit.id, hit.document)
+    })
+    return [...vendors.values()]
+  } catch (error) {
+    return filterMockVendors({ vendorNames, categories })
+  }
+}
+
+/**
+ * Filter the mock vendors locally (used without a backend)
+ */
+function filterMockVendors({ vendorNames = [], categories = [] }) {
   // Build regex patterns
   const vendorRegex = vendorNames.length > 0
     ? new RegExp(vendorNames.join('|'), 'i')